@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List
-import os
+from fastapi import APIRouter, HTTPException, Depends, File, Response, UploadFile
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import EmailStr, TypeAdapter, ValidationError
+from pymongo import DeleteOne, InsertOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from typing import List, Optional, Dict, Any, AsyncIterator, Literal
 from datetime import datetime
+import codecs
+import csv
+import json
+import logging
+import os
 
 from models import (
     PersonalInfo, PersonalInfoCreate, PersonalInfoUpdate,
@@ -17,33 +24,58 @@ from models import (
     Resource, ResourceCreate, ResourceUpdate,
     BlogPost, BlogPostCreate, BlogPostUpdate,
     PendingTestimonial,
+    NewsletterSubscription, NewsletterImportReport,
+    BulkRequest, BulkResponse, BulkItemResult,
     AdminUser
 )
 from auth import get_current_user
+from cache import content_cache
+from counters import increment_counters, COMPLETED_PROJECT_STATUS
+from database import get_database, run_in_transaction
+from pagination import PageParams, paginate
+from serialization import created, trusted_response
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'test_database')]
+logger = logging.getLogger(__name__)
 
 # Create admin router
 admin_router = APIRouter(prefix="/admin", tags=["admin"])
 
 
+def _flag(condition: bool) -> int:
+    """1 if condition holds, else 0 (for counter deltas)"""
+    return 1 if condition else 0
+
+
+def _applied(previous: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """Document as written by ``$set: changes`` over ``previous``.
+
+    Handlers that adjust counters need the old values, so they ask
+    find_one_and_update for the document before the write and derive the
+    new one here instead of reading it back.
+    """
+    return {**previous, **changes}
+
+
+def _filters(**values: Any) -> Dict[str, Any]:
+    """Equality filter from the query parameters that were provided"""
+    return {field: value for field, value in values.items() if value is not None}
+
+
 # ================== PERSONAL INFO ROUTES ==================
 
 @admin_router.get("/personal", response_model=PersonalInfo)
-async def get_personal_info(current_user: AdminUser = Depends(get_current_user)):
+async def get_personal_info(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get personal information (requires authentication)"""
     personal = await db.personal_info.find_one()
     if not personal:
         raise HTTPException(status_code=404, detail="Personal information not found")
-    return PersonalInfo(**personal)
+    return trusted_response(PersonalInfo, personal)
 
 @admin_router.post("/personal", response_model=PersonalInfo)
 async def create_personal_info(
     personal_input: PersonalInfoCreate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create personal information (requires authentication)"""
     # Check if personal info already exists
@@ -51,53 +83,54 @@ async def create_personal_info(
     if existing:
         raise HTTPException(status_code=400, detail="Personal information already exists. Use PUT to update.")
     
-    personal_dict = personal_input.dict()
-    personal_obj = PersonalInfo(**personal_dict)
+    personal_obj = created(PersonalInfo, personal_input)
     await db.personal_info.insert_one(personal_obj.dict())
+    content_cache.bump_version("personal_info")
     return personal_obj
 
 @admin_router.put("/personal", response_model=PersonalInfo)
 async def update_personal_info(
     personal_input: PersonalInfoUpdate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update personal information (requires authentication) (requires authentication)"""
-    existing = await db.personal_info.find_one()
-    if not existing:
-        raise HTTPException(status_code=404, detail="Personal information not found")
-    
     update_dict = personal_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    await db.personal_info.update_one(
-        {"id": existing["id"]},
-        {"$set": update_dict}
+    # personal_info holds a single document
+    updated_personal = await db.personal_info.find_one_and_update(
+        {},
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
-    
-    updated_personal = await db.personal_info.find_one({"id": existing["id"]})
-    return PersonalInfo(**updated_personal)
+    if updated_personal is None:
+        raise HTTPException(status_code=404, detail="Personal information not found")
+    content_cache.bump_version("personal_info")
+    return trusted_response(PersonalInfo, updated_personal)
 
 
 # ================== SKILL CATEGORY ROUTES ==================
 
 @admin_router.get("/skills", response_model=List[SkillCategory])
-async def get_skill_categories(current_user: AdminUser = Depends(get_current_user)):
+async def get_skill_categories(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get all skill categories (requires authentication)"""
     skills = await db.skill_categories.find().to_list(100)
-    return [SkillCategory(**skill) for skill in skills]
+    return trusted_response(SkillCategory, skills)
 
 @admin_router.get("/skills/{category_key}", response_model=SkillCategory)
-async def get_skill_category(category_key: str, current_user: AdminUser = Depends(get_current_user)):
+async def get_skill_category(category_key: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get specific skill category (requires authentication)"""
     skill = await db.skill_categories.find_one({"category_key": category_key})
     if not skill:
         raise HTTPException(status_code=404, detail="Skill category not found")
-    return SkillCategory(**skill)
+    return trusted_response(SkillCategory, skill)
 
 @admin_router.post("/skills", response_model=SkillCategory)
 async def create_skill_category(
     skill_input: SkillCategoryCreate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create new skill category (requires authentication) (requires authentication)"""
     # Check if category_key already exists
@@ -105,203 +138,253 @@ async def create_skill_category(
     if existing:
         raise HTTPException(status_code=400, detail="Skill category with this key already exists")
     
-    skill_dict = skill_input.dict()
-    skill_obj = SkillCategory(**skill_dict)
+    skill_obj = created(SkillCategory, skill_input)
     await db.skill_categories.insert_one(skill_obj.dict())
+    await increment_counters(db, skills_total=len(skill_obj.items))
+    content_cache.bump_version("skill_categories")
     return skill_obj
 
 @admin_router.put("/skills/{skill_id}", response_model=SkillCategory)
 async def update_skill_category(
     skill_id: str, 
     skill_input: SkillCategoryUpdate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update skill category (requires authentication) (requires authentication)"""
     update_dict = skill_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.skill_categories.update_one(
+    previous = await db.skill_categories.find_one_and_update(
         {"id": skill_id},
         {"$set": update_dict}
     )
+    content_cache.bump_version("skill_categories")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Skill category not found")
+    if "items" in update_dict:
+        await increment_counters(
+            db, skills_total=len(update_dict["items"]) - len(previous.get("items", []))
+        )
     
-    updated_skill = await db.skill_categories.find_one({"id": skill_id})
-    return SkillCategory(**updated_skill)
+    return trusted_response(SkillCategory, _applied(previous, update_dict))
 
 @admin_router.delete("/skills/{skill_id}")
 async def delete_skill_category(
     skill_id: str,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete skill category (requires authentication) (requires authentication)"""
-    result = await db.skill_categories.delete_one({"id": skill_id})
-    if result.deleted_count == 0:
+    deleted = await db.skill_categories.find_one_and_delete({"id": skill_id}, projection={"items": 1})
+    content_cache.bump_version("skill_categories")
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Skill category not found")
+    await increment_counters(db, skills_total=-len(deleted.get("items", [])))
     return {"message": "Skill category deleted successfully"}
 
 
 # ================== TECHNOLOGY ROUTES ==================
 
 @admin_router.get("/technologies", response_model=List[Technology])
-async def get_technologies(current_user: AdminUser = Depends(get_current_user)):
+async def get_technologies(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get all technologies (requires authentication)"""
     techs = await db.technologies.find().sort("name", 1).to_list(100)
-    return [Technology(**tech) for tech in techs]
+    return trusted_response(Technology, techs)
 
 @admin_router.post("/technologies", response_model=Technology)
 async def create_technology(
     tech_input: TechnologyCreate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create new technology (requires authentication) (requires authentication)"""
-    tech_dict = tech_input.dict()
-    tech_obj = Technology(**tech_dict)
+    tech_obj = created(Technology, tech_input)
     await db.technologies.insert_one(tech_obj.dict())
+    await increment_counters(db, technologies_total=1, technologies_expert=_flag(tech_obj.level == "expert"))
+    content_cache.bump_version("technologies")
     return tech_obj
 
 @admin_router.put("/technologies/{tech_id}", response_model=Technology)
 async def update_technology(
     tech_id: str, 
     tech_input: TechnologyUpdate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update technology (requires authentication) (requires authentication)"""
     update_dict = tech_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.technologies.update_one(
+    previous = await db.technologies.find_one_and_update(
         {"id": tech_id},
         {"$set": update_dict}
     )
+    content_cache.bump_version("technologies")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Technology not found")
+    if "level" in update_dict:
+        await increment_counters(
+            db, technologies_expert=_flag(update_dict["level"] == "expert") - _flag(previous.get("level") == "expert")
+        )
     
-    updated_tech = await db.technologies.find_one({"id": tech_id})
-    return Technology(**updated_tech)
+    return trusted_response(Technology, _applied(previous, update_dict))
 
 @admin_router.delete("/technologies/{tech_id}")
 async def delete_technology(
     tech_id: str,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete technology (requires authentication) (requires authentication)"""
-    result = await db.technologies.delete_one({"id": tech_id})
-    if result.deleted_count == 0:
+    deleted = await db.technologies.find_one_and_delete({"id": tech_id}, projection={"level": 1})
+    content_cache.bump_version("technologies")
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Technology not found")
+    await increment_counters(db, technologies_total=-1, technologies_expert=-_flag(deleted.get("level") == "expert"))
     return {"message": "Technology deleted successfully"}
 
 
 # ================== PROJECT ROUTES ==================
 
 @admin_router.get("/projects", response_model=List[Project])
-async def get_projects(current_user: AdminUser = Depends(get_current_user)):
-    """Get all projects (requires authentication)"""
-    projects = await db.projects.find().sort("order_index", 1).to_list(100)
-    return [Project(**project) for project in projects]
+async def get_projects(
+    response: Response,
+    status: Optional[str] = None,
+    category: Optional[str] = None,
+    page: PageParams = Depends(),
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get projects page by page, optionally filtered by status or category (requires authentication)"""
+    projects = await paginate(
+        db.projects, page, response,
+        filter=_filters(status=status, category=category),
+        sort_fields=["order_index", "created_at"],
+        default_sort="order_index"
+    )
+    return trusted_response(Project, projects, response)
 
 @admin_router.get("/projects/{project_id}", response_model=Project)
-async def get_project(project_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def get_project(project_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get specific project (requires authentication)"""
     project = await db.projects.find_one({"id": project_id})
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return Project(**project)
+    return trusted_response(Project, project)
 
 @admin_router.post("/projects", response_model=Project)
 async def create_project(
     project_input: ProjectCreate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create new project (requires authentication) (requires authentication)"""
-    project_dict = project_input.dict()
-    project_obj = Project(**project_dict)
+    project_obj = created(Project, project_input)
     await db.projects.insert_one(project_obj.dict())
+    await increment_counters(
+        db, projects_total=1, projects_completed=_flag(project_obj.status == COMPLETED_PROJECT_STATUS)
+    )
+    content_cache.bump_version("projects")
     return project_obj
 
 @admin_router.put("/projects/{project_id}", response_model=Project)
 async def update_project(
     project_id: str, 
     project_input: ProjectUpdate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update project (requires authentication) (requires authentication)"""
     update_dict = project_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.projects.update_one(
+    previous = await db.projects.find_one_and_update(
         {"id": project_id},
         {"$set": update_dict}
     )
+    content_cache.bump_version("projects")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    if "status" in update_dict:
+        await increment_counters(
+            db,
+            projects_completed=_flag(update_dict["status"] == COMPLETED_PROJECT_STATUS)
+            - _flag(previous.get("status") == COMPLETED_PROJECT_STATUS)
+        )
     
-    updated_project = await db.projects.find_one({"id": project_id})
-    return Project(**updated_project)
+    return trusted_response(Project, _applied(previous, update_dict))
 
 @admin_router.delete("/projects/{project_id}")
 async def delete_project(
     project_id: str,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete project (requires authentication) (requires authentication)"""
-    result = await db.projects.delete_one({"id": project_id})
-    if result.deleted_count == 0:
+    deleted = await db.projects.find_one_and_delete({"id": project_id}, projection={"status": 1})
+    content_cache.bump_version("projects")
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Project not found")
+    await increment_counters(
+        db, projects_total=-1, projects_completed=-_flag(deleted.get("status") == COMPLETED_PROJECT_STATUS)
+    )
     return {"message": "Project deleted successfully"}
 
 
 # ================== SERVICE ROUTES ==================
 
 @admin_router.get("/services", response_model=List[Service])
-async def get_services(current_user: AdminUser = Depends(get_current_user)):
+async def get_services(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get all services (requires authentication)"""
     services = await db.services.find().sort("order_index", 1).to_list(100)
-    return [Service(**service) for service in services]
+    return trusted_response(Service, services)
 
 @admin_router.get("/services/{service_id}", response_model=Service)
-async def get_service(service_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def get_service(service_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get specific service (requires authentication)"""
     service = await db.services.find_one({"id": service_id})
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    return Service(**service)
+    return trusted_response(Service, service)
 
 @admin_router.post("/services", response_model=Service)
-async def create_service(service_input: ServiceCreate, current_user: AdminUser = Depends(get_current_user)):
+async def create_service(service_input: ServiceCreate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create new service (requires authentication)"""
-    service_dict = service_input.dict()
-    service_obj = Service(**service_dict)
+    service_obj = created(Service, service_input)
     await db.services.insert_one(service_obj.dict())
+    await increment_counters(db, services_total=1)
+    content_cache.bump_version("services")
     return service_obj
 
 @admin_router.put("/services/{service_id}", response_model=Service)
-async def update_service(service_id: str, service_input: ServiceUpdate, current_user: AdminUser = Depends(get_current_user)):
+async def update_service(service_id: str, service_input: ServiceUpdate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update service (requires authentication)"""
     update_dict = service_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.services.update_one(
+    updated_service = await db.services.find_one_and_update(
         {"id": service_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
+    content_cache.bump_version("services")
     
-    if result.matched_count == 0:
+    if updated_service is None:
         raise HTTPException(status_code=404, detail="Service not found")
-    
-    updated_service = await db.services.find_one({"id": service_id})
-    return Service(**updated_service)
+    return trusted_response(Service, updated_service)
 
 @admin_router.delete("/services/{service_id}")
-async def delete_service(service_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def delete_service(service_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete service (requires authentication)"""
     result = await db.services.delete_one({"id": service_id})
+    content_cache.bump_version("services")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Service not found")
+    await increment_counters(db, services_total=-1)
     return {"message": "Service deleted successfully"}
 
 
@@ -309,137 +392,174 @@ async def delete_service(service_id: str, current_user: AdminUser = Depends(get_
 
 # IMPORTANT: Routes plus spécifiques (avec /pending) DOIVENT être avant les routes avec paramètres
 @admin_router.get("/testimonials/pending", response_model=List[PendingTestimonial])
-async def get_pending_testimonials(current_user: AdminUser = Depends(get_current_user)):
+async def get_pending_testimonials(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get all pending testimonials (requires authentication)"""
     testimonials = await db.pending_testimonials.find({"status": "pending"}).sort("submitted_at", -1).to_list(100)
-    return [PendingTestimonial(**testimonial) for testimonial in testimonials]
+    return trusted_response(PendingTestimonial, testimonials)
 
 @admin_router.put("/testimonials/pending/{testimonial_id}/approve")
-async def approve_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def approve_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Approve pending testimonial and move to testimonials (requires authentication)"""
-    pending = await db.pending_testimonials.find_one({"id": testimonial_id})
-    if not pending:
-        raise HTTPException(status_code=404, detail="Pending testimonial not found")
+    async def approve(session):
+        # Conditional update: a testimonial can only be approved once
+        pending = await db.pending_testimonials.find_one_and_update(
+            {"id": testimonial_id, "status": {"$ne": "approved"}},
+            {"$set": {"status": "approved", "reviewed_at": datetime.utcnow()}},
+            session=session
+        )
+        if pending is None:
+            return None, None
+        
+        # Create testimonial from pending
+        testimonial_data = {
+            "name": pending["name"],
+            "role": pending.get("role", "Client"),
+            "company": pending.get("company", ""),
+            "content": pending["content"],
+            "rating": pending["rating"],
+            "featured": False
+        }
+        testimonial_obj = Testimonial(**testimonial_data)
+        await db.testimonials.insert_one(testimonial_obj.dict(), session=session)
+        return pending, testimonial_obj
     
-    # Create testimonial from pending
-    testimonial_data = {
-        "name": pending["name"],
-        "role": pending.get("role", "Client"),
-        "company": pending.get("company", ""),
-        "content": pending["content"],
-        "rating": pending["rating"],
-        "featured": False
-    }
-    
-    testimonial_obj = Testimonial(**testimonial_data)
-    await db.testimonials.insert_one(testimonial_obj.dict())
+    pending, testimonial_obj = await run_in_transaction(approve)
+    if pending is None:
+        if await db.pending_testimonials.count_documents({"id": testimonial_id}, limit=1):
+            raise HTTPException(status_code=409, detail="Testimonial already approved")
+        raise HTTPException(status_code=404, detail="Pending testimonial not found")
     
-    # Update pending status
-    await db.pending_testimonials.update_one(
-        {"id": testimonial_id},
-        {"$set": {"status": "approved", "reviewed_at": datetime.utcnow()}}
+    await increment_counters(
+        db,
+        testimonials_total=1,
+        testimonials_rating_sum=testimonial_obj.rating,
+        pending_testimonials=-_flag(pending.get("status") == "pending")
     )
+    content_cache.bump_version("testimonials")
+    content_cache.bump_version("pending_testimonials")
     
     return {"message": "Testimonial approved and added"}
 
 @admin_router.put("/testimonials/pending/{testimonial_id}/reject")
-async def reject_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def reject_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Reject pending testimonial (requires authentication)"""
-    result = await db.pending_testimonials.update_one(
+    previous = await db.pending_testimonials.find_one_and_update(
         {"id": testimonial_id},
-        {"$set": {"status": "rejected", "reviewed_at": datetime.utcnow()}}
+        {"$set": {"status": "rejected", "reviewed_at": datetime.utcnow()}},
+        projection={"status": 1}
     )
+    content_cache.bump_version("pending_testimonials")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Pending testimonial not found")
+    await increment_counters(db, pending_testimonials=-_flag(previous.get("status") == "pending"))
     
     return {"message": "Testimonial rejected"}
 
 @admin_router.get("/testimonials", response_model=List[Testimonial])
-async def get_testimonials(current_user: AdminUser = Depends(get_current_user)):
-    """Get all testimonials (requires authentication)"""
-    testimonials = await db.testimonials.find().sort("order_index", 1).to_list(100)
-    return [Testimonial(**testimonial) for testimonial in testimonials]
+async def get_testimonials(
+    response: Response,
+    featured: Optional[bool] = None,
+    page: PageParams = Depends(),
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get testimonials page by page, optionally filtered by featured (requires authentication)"""
+    testimonials = await paginate(
+        db.testimonials, page, response,
+        filter=_filters(featured=featured),
+        sort_fields=["order_index", "created_at"],
+        default_sort="order_index"
+    )
+    return trusted_response(Testimonial, testimonials, response)
 
 @admin_router.get("/testimonials/{testimonial_id}", response_model=Testimonial)
-async def get_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def get_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get specific testimonial (requires authentication)"""
     testimonial = await db.testimonials.find_one({"id": testimonial_id})
     if not testimonial:
         raise HTTPException(status_code=404, detail="Testimonial not found")
-    return Testimonial(**testimonial)
+    return trusted_response(Testimonial, testimonial)
 
 @admin_router.post("/testimonials", response_model=Testimonial)
-async def create_testimonial(testimonial_input: TestimonialCreate, current_user: AdminUser = Depends(get_current_user)):
+async def create_testimonial(testimonial_input: TestimonialCreate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create new testimonial (requires authentication)"""
-    testimonial_dict = testimonial_input.dict()
-    testimonial_obj = Testimonial(**testimonial_dict)
+    testimonial_obj = created(Testimonial, testimonial_input)
     await db.testimonials.insert_one(testimonial_obj.dict())
+    await increment_counters(db, testimonials_total=1, testimonials_rating_sum=testimonial_obj.rating)
+    content_cache.bump_version("testimonials")
     return testimonial_obj
 
 @admin_router.put("/testimonials/{testimonial_id}", response_model=Testimonial)
-async def update_testimonial(testimonial_id: str, testimonial_input: TestimonialUpdate, current_user: AdminUser = Depends(get_current_user)):
+async def update_testimonial(testimonial_id: str, testimonial_input: TestimonialUpdate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update testimonial (requires authentication)"""
     update_dict = testimonial_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.testimonials.update_one(
+    previous = await db.testimonials.find_one_and_update(
         {"id": testimonial_id},
         {"$set": update_dict}
     )
+    content_cache.bump_version("testimonials")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    if "rating" in update_dict:
+        await increment_counters(
+            db, testimonials_rating_sum=update_dict["rating"] - previous.get("rating", 0)
+        )
     
-    updated_testimonial = await db.testimonials.find_one({"id": testimonial_id})
-    return Testimonial(**updated_testimonial)
+    return trusted_response(Testimonial, _applied(previous, update_dict))
 
 @admin_router.delete("/testimonials/{testimonial_id}")
-async def delete_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def delete_testimonial(testimonial_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete testimonial (requires authentication)"""
-    result = await db.testimonials.delete_one({"id": testimonial_id})
-    if result.deleted_count == 0:
+    deleted = await db.testimonials.find_one_and_delete({"id": testimonial_id}, projection={"rating": 1})
+    content_cache.bump_version("testimonials")
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    await increment_counters(db, testimonials_total=-1, testimonials_rating_sum=-deleted.get("rating", 0))
     return {"message": "Testimonial deleted successfully"}
 
 
 # ================== STATISTICS ROUTES ==================
 
 @admin_router.get("/statistics", response_model=List[Statistic])
-async def get_statistics(current_user: AdminUser = Depends(get_current_user)):
+async def get_statistics(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get all statistics (requires authentication)"""
     stats = await db.statistics.find().sort("order_index", 1).to_list(100)
-    return [Statistic(**stat) for stat in stats]
+    return trusted_response(Statistic, stats)
 
 @admin_router.post("/statistics", response_model=Statistic)
-async def create_statistic(stat_input: StatisticCreate, current_user: AdminUser = Depends(get_current_user)):
+async def create_statistic(stat_input: StatisticCreate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create new statistic (requires authentication)"""
-    stat_dict = stat_input.dict()
-    stat_obj = Statistic(**stat_dict)
+    stat_obj = created(Statistic, stat_input)
     await db.statistics.insert_one(stat_obj.dict())
+    content_cache.bump_version("statistics")
     return stat_obj
 
 @admin_router.put("/statistics/{stat_id}", response_model=Statistic)
-async def update_statistic(stat_id: str, stat_input: StatisticUpdate, current_user: AdminUser = Depends(get_current_user)):
+async def update_statistic(stat_id: str, stat_input: StatisticUpdate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update statistic (requires authentication)"""
     update_dict = stat_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.statistics.update_one(
+    updated_stat = await db.statistics.find_one_and_update(
         {"id": stat_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
+    content_cache.bump_version("statistics")
     
-    if result.matched_count == 0:
+    if updated_stat is None:
         raise HTTPException(status_code=404, detail="Statistic not found")
-    
-    updated_stat = await db.statistics.find_one({"id": stat_id})
-    return Statistic(**updated_stat)
+    return trusted_response(Statistic, updated_stat)
 
 @admin_router.delete("/statistics/{stat_id}")
-async def delete_statistic(stat_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def delete_statistic(stat_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete statistic (requires authentication)"""
     result = await db.statistics.delete_one({"id": stat_id})
+    content_cache.bump_version("statistics")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Statistic not found")
     return {"message": "Statistic deleted successfully"}
@@ -448,40 +568,41 @@ async def delete_statistic(stat_id: str, current_user: AdminUser = Depends(get_c
 # ================== SOCIAL LINKS ROUTES ==================
 
 @admin_router.get("/social-links", response_model=List[SocialLink])
-async def get_social_links(current_user: AdminUser = Depends(get_current_user)):
+async def get_social_links(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get all social links (requires authentication)"""
     links = await db.social_links.find().sort("order_index", 1).to_list(100)
-    return [SocialLink(**link) for link in links]
+    return trusted_response(SocialLink, links)
 
 @admin_router.post("/social-links", response_model=SocialLink)
-async def create_social_link(link_input: SocialLinkCreate, current_user: AdminUser = Depends(get_current_user)):
+async def create_social_link(link_input: SocialLinkCreate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create new social link (requires authentication)"""
-    link_dict = link_input.dict()
-    link_obj = SocialLink(**link_dict)
+    link_obj = created(SocialLink, link_input)
     await db.social_links.insert_one(link_obj.dict())
+    content_cache.bump_version("social_links")
     return link_obj
 
 @admin_router.put("/social-links/{link_id}", response_model=SocialLink)
-async def update_social_link(link_id: str, link_input: SocialLinkUpdate, current_user: AdminUser = Depends(get_current_user)):
+async def update_social_link(link_id: str, link_input: SocialLinkUpdate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update social link (requires authentication)"""
     update_dict = link_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.social_links.update_one(
+    updated_link = await db.social_links.find_one_and_update(
         {"id": link_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
+    content_cache.bump_version("social_links")
     
-    if result.matched_count == 0:
+    if updated_link is None:
         raise HTTPException(status_code=404, detail="Social link not found")
-    
-    updated_link = await db.social_links.find_one({"id": link_id})
-    return SocialLink(**updated_link)
+    return trusted_response(SocialLink, updated_link)
 
 @admin_router.delete("/social-links/{link_id}")
-async def delete_social_link(link_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def delete_social_link(link_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete social link (requires authentication)"""
     result = await db.social_links.delete_one({"id": link_id})
+    content_cache.bump_version("social_links")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Social link not found")
     return {"message": "Social link deleted successfully"}
@@ -490,40 +611,41 @@ async def delete_social_link(link_id: str, current_user: AdminUser = Depends(get
 # ================== PROCESS STEPS ROUTES ==================
 
 @admin_router.get("/process-steps", response_model=List[ProcessStep])
-async def get_process_steps(current_user: AdminUser = Depends(get_current_user)):
+async def get_process_steps(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get all process steps (requires authentication)"""
     steps = await db.process_steps.find().sort("step", 1).to_list(100)
-    return [ProcessStep(**step) for step in steps]
+    return trusted_response(ProcessStep, steps)
 
 @admin_router.post("/process-steps", response_model=ProcessStep)
-async def create_process_step(step_input: ProcessStepCreate, current_user: AdminUser = Depends(get_current_user)):
+async def create_process_step(step_input: ProcessStepCreate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create new process step (requires authentication)"""
-    step_dict = step_input.dict()
-    step_obj = ProcessStep(**step_dict)
+    step_obj = created(ProcessStep, step_input)
     await db.process_steps.insert_one(step_obj.dict())
+    content_cache.bump_version("process_steps")
     return step_obj
 
 @admin_router.put("/process-steps/{step_id}", response_model=ProcessStep)
-async def update_process_step(step_id: str, step_input: ProcessStepUpdate, current_user: AdminUser = Depends(get_current_user)):
+async def update_process_step(step_id: str, step_input: ProcessStepUpdate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update process step (requires authentication)"""
     update_dict = step_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.process_steps.update_one(
+    updated_step = await db.process_steps.find_one_and_update(
         {"id": step_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
+    content_cache.bump_version("process_steps")
     
-    if result.matched_count == 0:
+    if updated_step is None:
         raise HTTPException(status_code=404, detail="Process step not found")
-    
-    updated_step = await db.process_steps.find_one({"id": step_id})
-    return ProcessStep(**updated_step)
+    return trusted_response(ProcessStep, updated_step)
 
 @admin_router.delete("/process-steps/{step_id}")
-async def delete_process_step(step_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def delete_process_step(step_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete process step (requires authentication)"""
     result = await db.process_steps.delete_one({"id": step_id})
+    content_cache.bump_version("process_steps")
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Process step not found")
     return {"message": "Process step deleted successfully"}
@@ -532,109 +654,437 @@ async def delete_process_step(step_id: str, current_user: AdminUser = Depends(ge
 # ================== RESOURCE ROUTES ==================
 
 @admin_router.get("/resources", response_model=List[Resource])
-async def get_resources(current_user: AdminUser = Depends(get_current_user)):
-    """Get all resources (requires authentication)"""
-    resources = await db.resources.find().sort("created_at", -1).to_list(100)
-    return [Resource(**resource) for resource in resources]
+async def get_resources(
+    response: Response,
+    category: Optional[str] = None,
+    page: PageParams = Depends(),
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get resources page by page, optionally filtered by category (requires authentication)"""
+    resources = await paginate(
+        db.resources, page, response,
+        filter=_filters(category=category),
+        sort_fields=["created_at", "downloads"],
+        default_sort="-created_at"
+    )
+    return trusted_response(Resource, resources, response)
 
 @admin_router.get("/resources/{resource_id}", response_model=Resource)
-async def get_resource(resource_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def get_resource(resource_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get specific resource (requires authentication)"""
     resource = await db.resources.find_one({"id": resource_id})
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
-    return Resource(**resource)
+    return trusted_response(Resource, resource)
 
 @admin_router.post("/resources", response_model=Resource)
-async def create_resource(resource_input: ResourceCreate, current_user: AdminUser = Depends(get_current_user)):
+async def create_resource(resource_input: ResourceCreate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create new resource (requires authentication)"""
-    resource_dict = resource_input.dict()
-    resource_obj = Resource(**resource_dict)
+    resource_obj = created(Resource, resource_input)
     await db.resources.insert_one(resource_obj.dict())
+    content_cache.bump_version("resources")
     return resource_obj
 
 @admin_router.put("/resources/{resource_id}", response_model=Resource)
-async def update_resource(resource_id: str, resource_input: ResourceUpdate, current_user: AdminUser = Depends(get_current_user)):
+async def update_resource(resource_id: str, resource_input: ResourceUpdate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update resource (requires authentication)"""
     update_dict = resource_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.resources.update_one(
+    updated_resource = await db.resources.find_one_and_update(
         {"id": resource_id},
-        {"$set": update_dict}
+        {"$set": update_dict},
+        return_document=ReturnDocument.AFTER
     )
+    content_cache.bump_version("resources")
     
-    if result.matched_count == 0:
+    if updated_resource is None:
         raise HTTPException(status_code=404, detail="Resource not found")
-    
-    updated_resource = await db.resources.find_one({"id": resource_id})
-    return Resource(**updated_resource)
+    return trusted_response(Resource, updated_resource)
 
 @admin_router.delete("/resources/{resource_id}")
-async def delete_resource(resource_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def delete_resource(resource_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete resource (requires authentication)"""
-    result = await db.resources.delete_one({"id": resource_id})
-    if result.deleted_count == 0:
+    deleted = await db.resources.find_one_and_delete({"id": resource_id}, projection={"downloads": 1})
+    content_cache.bump_version("resources")
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Resource not found")
+    await increment_counters(db, downloads_total=-deleted.get("downloads", 0))
     return {"message": "Resource deleted successfully"}
 
 
 # ================== BLOG ROUTES ==================
 
 @admin_router.get("/blog", response_model=List[BlogPost])
-async def get_blog_posts(current_user: AdminUser = Depends(get_current_user)):
-    """Get all blog posts (requires authentication)"""
-    posts = await db.blog_posts.find().sort("created_at", -1).to_list(100)
-    return [BlogPost(**post) for post in posts]
+async def get_blog_posts(
+    response: Response,
+    published: Optional[bool] = None,
+    category: Optional[str] = None,
+    page: PageParams = Depends(),
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get blog posts page by page, optionally filtered by published or category (requires authentication)"""
+    posts = await paginate(
+        db.blog_posts, page, response,
+        filter=_filters(published=published, category=category),
+        sort_fields=["created_at", "published_at"],
+        default_sort="-created_at"
+    )
+    return trusted_response(BlogPost, posts, response)
 
 @admin_router.get("/blog/{post_id}", response_model=BlogPost)
-async def get_blog_post(post_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def get_blog_post(post_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get specific blog post (requires authentication)"""
     post = await db.blog_posts.find_one({"id": post_id})
     if not post:
         raise HTTPException(status_code=404, detail="Blog post not found")
-    return BlogPost(**post)
+    return trusted_response(BlogPost, post)
 
 @admin_router.post("/blog", response_model=BlogPost)
-async def create_blog_post(post_input: BlogPostCreate, current_user: AdminUser = Depends(get_current_user)):
+async def create_blog_post(post_input: BlogPostCreate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Create new blog post (requires authentication)"""
-    post_dict = post_input.dict()
+    post_obj = created(BlogPost, post_input)
     # Set published_at if publishing
-    if post_dict.get("published", False):
-        post_dict["published_at"] = datetime.utcnow()
+    if post_obj.published:
+        post_obj.published_at = datetime.utcnow()
     
-    post_obj = BlogPost(**post_dict)
     await db.blog_posts.insert_one(post_obj.dict())
+    await increment_counters(db, blog_posts_published=_flag(post_obj.published))
+    content_cache.bump_version("blog_posts")
     return post_obj
 
 @admin_router.put("/blog/{post_id}", response_model=BlogPost)
-async def update_blog_post(post_id: str, post_input: BlogPostUpdate, current_user: AdminUser = Depends(get_current_user)):
+async def update_blog_post(post_id: str, post_input: BlogPostUpdate, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update blog post (requires authentication)"""
     update_dict = post_input.dict(exclude_unset=True)
     update_dict["updated_at"] = datetime.utcnow()
     
-    # Set published_at if publishing for first time
+    # Conditional update: published_at is only set when publishing for the first time
+    update = [{"$set": {field: {"$literal": value} for field, value in update_dict.items()}}]
     if update_dict.get("published", False):
-        existing_post = await db.blog_posts.find_one({"id": post_id})
-        if existing_post and not existing_post.get("published_at"):
-            update_dict["published_at"] = datetime.utcnow()
+        update[0]["$set"]["published_at"] = {"$ifNull": ["$published_at", update_dict["updated_at"]]}
     
-    result = await db.blog_posts.update_one(
-        {"id": post_id},
-        {"$set": update_dict}
-    )
+    previous = await db.blog_posts.find_one_and_update({"id": post_id}, update)
+    content_cache.bump_version("blog_posts")
     
-    if result.matched_count == 0:
+    if previous is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
+    if update_dict.get("published", False):
+        update_dict["published_at"] = previous.get("published_at") or update_dict["updated_at"]
+    if "published" in update_dict:
+        await increment_counters(
+            db, blog_posts_published=_flag(update_dict["published"]) - _flag(previous.get("published", False))
+        )
     
-    updated_post = await db.blog_posts.find_one({"id": post_id})
-    return BlogPost(**updated_post)
+    return trusted_response(BlogPost, _applied(previous, update_dict))
 
 @admin_router.delete("/blog/{post_id}")
-async def delete_blog_post(post_id: str, current_user: AdminUser = Depends(get_current_user)):
+async def delete_blog_post(post_id: str, current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
     """Delete blog post (requires authentication)"""
-    result = await db.blog_posts.delete_one({"id": post_id})
-    if result.deleted_count == 0:
+    deleted = await db.blog_posts.find_one_and_delete({"id": post_id}, projection={"published": 1})
+    content_cache.bump_version("blog_posts")
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Blog post not found")
+    await increment_counters(db, blog_posts_published=-_flag(deleted.get("published", False)))
     return {"message": "Blog post deleted successfully"}
 
+
+# ================== BULK ROUTES ==================
+
+def _project_counters(project: Dict[str, Any]) -> Dict[str, int]:
+    return {"projects_total": 1, "projects_completed": _flag(project.get("status") == COMPLETED_PROJECT_STATUS)}
+
+
+def _testimonial_counters(testimonial: Dict[str, Any]) -> Dict[str, int]:
+    return {"testimonials_total": 1, "testimonials_rating_sum": testimonial.get("rating", 0)}
+
+
+# Collections accepting /admin/{collection}/bulk: models, and the counters one document contributes
+BULK_COLLECTIONS: Dict[str, Dict[str, Any]] = {
+    "projects": {
+        "collection": "projects", "model": Project, "create": ProjectCreate, "update": ProjectUpdate,
+        "counters": _project_counters, "counter_fields": ("status",), "order_field": "order_index",
+    },
+    "services": {
+        "collection": "services", "model": Service, "create": ServiceCreate, "update": ServiceUpdate,
+        "counters": lambda service: {"services_total": 1}, "counter_fields": (), "order_field": "order_index",
+    },
+    "testimonials": {
+        "collection": "testimonials", "model": Testimonial, "create": TestimonialCreate, "update": TestimonialUpdate,
+        "counters": _testimonial_counters, "counter_fields": ("rating",), "order_field": "order_index",
+    },
+    "social-links": {
+        "collection": "social_links", "model": SocialLink, "create": SocialLinkCreate, "update": SocialLinkUpdate,
+        "counters": None, "counter_fields": (), "order_field": "order_index",
+    },
+    "process-steps": {
+        "collection": "process_steps", "model": ProcessStep, "create": ProcessStepCreate, "update": ProcessStepUpdate,
+        "counters": None, "counter_fields": (),
+        # Process steps are listed by their step number
+        "order_field": "step",
+    },
+}
+
+
+def _add_counters(totals: Dict[str, int], deltas: Dict[str, int], sign: int = 1):
+    for name, delta in deltas.items():
+        totals[name] = totals.get(name, 0) + sign * delta
+
+
+@admin_router.post("/{collection}/bulk", response_model=BulkResponse)
+async def bulk_write_collection(
+    collection: str,
+    bulk: BulkRequest,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Apply create/update/delete batches and a reorder map on the collection's order field in one bulk_write (requires authentication)"""
+    spec = BULK_COLLECTIONS.get(collection)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Bulk writes are not supported for {collection}")
+
+    model = spec["model"]
+    counters = spec["counters"]
+    timestamped = "updated_at" in model.model_fields
+    now = datetime.utcnow()
+    results: List[BulkItemResult] = []
+    operations = []
+    # operations[i] -> (results index, document or changes used for counters)
+    pending: List[Any] = []
+
+    # Previous counter fields for deletes and counter-changing updates; deletes also need
+    # it to tell missing ids apart, since a delete leaves nothing to check afterwards
+    watched = [item.id for item in bulk.update if counters and set(item.changes) & set(spec["counter_fields"])]
+    previous: Dict[str, Dict[str, Any]] = {}
+    if bulk.delete or watched:
+        projection = {"_id": 0, "id": 1, **{field: 1 for field in spec["counter_fields"]}}
+        async for document in db[spec["collection"]].find({"id": {"$in": bulk.delete + watched}}, projection):
+            previous[document["id"]] = document
+
+    def queue(operation, result: BulkItemResult, document: Any = None):
+        operations.append(operation)
+        pending.append((len(results), document))
+        results.append(result)
+
+    for index, data in enumerate(bulk.create):
+        try:
+            document = created(model, spec["create"](**data)).dict()
+        except ValidationError as e:
+            results.append(BulkItemResult(op="create", index=index, status="invalid", error=str(e)))
+            continue
+        queue(InsertOne(document), BulkItemResult(op="create", index=index, id=document["id"], status="ok"), document)
+
+    for index, item in enumerate(bulk.update):
+        try:
+            changes = spec["update"](**item.changes).dict(exclude_unset=True)
+        except ValidationError as e:
+            results.append(BulkItemResult(op="update", index=index, id=item.id, status="invalid", error=str(e)))
+            continue
+        if item.id in watched and item.id not in previous:
+            results.append(BulkItemResult(op="update", index=index, id=item.id, status="not_found"))
+            continue
+        if timestamped:
+            changes["updated_at"] = now
+        queue(UpdateOne({"id": item.id}, {"$set": changes}),
+              BulkItemResult(op="update", index=index, id=item.id, status="ok"), changes)
+
+    for index, (item_id, position) in enumerate(bulk.reorder.items()):
+        changes = {spec["order_field"]: position, **({"updated_at": now} if timestamped else {})}
+        queue(UpdateOne({"id": item_id}, {"$set": changes}),
+              BulkItemResult(op="reorder", index=index, id=item_id, status="ok"))
+
+    for index, item_id in enumerate(bulk.delete):
+        if item_id not in previous:
+            results.append(BulkItemResult(op="delete", index=index, id=item_id, status="not_found"))
+            continue
+        queue(DeleteOne({"id": item_id}), BulkItemResult(op="delete", index=index, id=item_id, status="ok"))
+
+    response = BulkResponse(results=results)
+    if not operations:
+        return response
+
+    try:
+        result = await db[spec["collection"]].bulk_write(operations, ordered=False)
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for error in details.get("writeErrors", []):
+            result_index, _ = pending[error["index"]]
+            results[result_index].status = "error"
+            results[result_index].error = error.get("errmsg")
+    content_cache.bump_version(spec["collection"])
+
+    response.inserted = details.get("nInserted", 0)
+    response.modified = details.get("nModified", 0)
+    response.deleted = details.get("nRemoved", 0)
+
+    # Updates that matched nothing are only looked up when the matched count says some are missing
+    updates = [i for i, _ in pending if results[i].op in ("update", "reorder") and results[i].status == "ok"]
+    if details.get("nMatched", 0) < len(updates):
+        found = {document["id"] async for document in db[spec["collection"]].find(
+            {"id": {"$in": [results[i].id for i in updates]}}, {"_id": 0, "id": 1}
+        )}
+        for result_index in updates:
+            if results[result_index].id not in found:
+                results[result_index].status = "not_found"
+
+    if counters:
+        totals: Dict[str, int] = {}
+        for result_index, document in pending:
+            item = results[result_index]
+            if item.status != "ok":
+                continue
+            if item.op == "create":
+                _add_counters(totals, counters(document))
+            elif item.op == "delete":
+                _add_counters(totals, counters(previous[item.id]), sign=-1)
+            elif item.op == "update" and item.id in previous:
+                _add_counters(totals, counters({**previous[item.id], **document}))
+                _add_counters(totals, counters(previous[item.id]), sign=-1)
+        await increment_counters(db, **totals)
+
+    return response
+
+
+# ================== NEWSLETTER ROUTES ==================
+
+IMPORT_BATCH_SIZE = int(os.environ.get("NEWSLETTER_IMPORT_BATCH_SIZE", "1000"))
+DUPLICATE_KEY = 11000
+IMPORT_CHUNK_BYTES = 64 * 1024
+INVALID_SAMPLE_SIZE = 20
+
+_email_adapter = TypeAdapter(EmailStr)
+
+
+async def _upload_lines(upload: UploadFile) -> AsyncIterator[str]:
+    """Decode an upload line by line without reading it whole"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    while True:
+        chunk = await upload.read(IMPORT_CHUNK_BYTES)
+        pending += decoder.decode(chunk, final=not chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+        if not chunk:
+            break
+    if pending:
+        yield pending
+
+
+async def _import_records(upload: UploadFile, format: str) -> AsyncIterator[str]:
+    """Raw email values from a CSV (``email`` column, or the first one) or NDJSON upload"""
+    email_column = None
+    async for line in _upload_lines(upload):
+        if not line.strip():
+            continue
+        if format == "ndjson":
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield line
+                continue
+            yield record.get("email", "") if isinstance(record, dict) else str(record)
+            continue
+
+        row = next(csv.reader([line]))
+        if email_column is None:
+            header = [cell.strip().lower() for cell in row]
+            email_column = header.index("email") if "email" in header else 0
+            if "email" in header:
+                continue
+        yield row[email_column] if email_column < len(row) else ""
+
+
+async def _load_subscribers(db: AsyncIOMotorDatabase, emails: List[str], report: NewsletterImportReport):
+    """Upsert one validated batch; existing addresses are left untouched and counted as duplicates"""
+    try:
+        result = await db.newsletter_subscriptions.bulk_write(
+            [UpdateOne({"email": email}, {"$setOnInsert": NewsletterSubscription(email=email).dict()}, upsert=True)
+             for email in emails],
+            ordered=False
+        )
+        details = result.bulk_api_result
+    except BulkWriteError as e:
+        # Unordered: the rest of the batch was applied. A concurrent subscribe of the
+        # same address makes the upsert's insert lose the race on the unique email index.
+        details = e.details
+        for error in details.get("writeErrors", []):
+            if error.get("code") == DUPLICATE_KEY:
+                report.duplicates += 1
+            else:
+                report.failed += 1
+    report.inserted += details.get("nUpserted", 0)
+    report.duplicates += details.get("nMatched", 0)
+
+
+async def dedupe_newsletter_subscriptions(db: AsyncIOMotorDatabase) -> int:
+    """Move duplicate subscriptions aside so the unique email index can be built.
+
+    One subscription per email is kept: an unsubscribed one if there is any, so
+    an opt-out is never undone, otherwise the oldest. The others are copied to
+    ``newsletter_subscriptions_duplicates`` and then deleted.
+    """
+    groups = db.newsletter_subscriptions.aggregate([
+        # "unsubscribed" sorts before "active" in descending order
+        {"$sort": {"status": -1, "subscribed_at": 1}},
+        {"$group": {"_id": "$email", "ids": {"$push": "$_id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+    extra = [object_id async for group in groups for object_id in group["ids"][1:]]
+    if not extra:
+        return 0
+
+    duplicates = await db.newsletter_subscriptions.find({"_id": {"$in": extra}}).to_list(None)
+    # Upserts by _id, so a run interrupted before the delete can simply be repeated
+    await db.newsletter_subscriptions_duplicates.bulk_write(
+        [ReplaceOne({"_id": document["_id"]}, document, upsert=True) for document in duplicates],
+        ordered=False
+    )
+    await db.newsletter_subscriptions.delete_many({"_id": {"$in": extra}})
+    active = sum(1 for document in duplicates if document.get("status") == "active")
+    if active:
+        await increment_counters(db, newsletter_active=-active)
+    content_cache.bump_version("newsletter_subscriptions")
+    logger.warning(f"Moved {len(duplicates)} duplicate newsletter subscriptions to newsletter_subscriptions_duplicates")
+    return len(duplicates)
+
+
+@admin_router.post("/newsletter/import", response_model=NewsletterImportReport)
+async def import_newsletter_subscribers(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Bulk import subscribers from a CSV or NDJSON upload (requires authentication)"""
+    format = format or ("ndjson" if (file.filename or "").endswith((".ndjson", ".jsonl")) else "csv")
+    report = NewsletterImportReport()
+    seen = set()
+    batch: List[str] = []
+
+    async for value in _import_records(file, format):
+        try:
+            email = str(_email_adapter.validate_python(str(value).strip()))
+        except ValidationError:
+            report.invalid += 1
+            if len(report.invalid_samples) < INVALID_SAMPLE_SIZE:
+                report.invalid_samples.append(str(value)[:200])
+            continue
+        if email in seen:
+            report.duplicates += 1
+            continue
+        seen.add(email)
+        batch.append(email)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await _load_subscribers(db, batch, report)
+            batch = []
+    if batch:
+        await _load_subscribers(db, batch, report)
+
+    if report.inserted:
+        await increment_counters(db, newsletter_active=report.inserted)
+        content_cache.bump_version("newsletter_subscriptions")
+    return report
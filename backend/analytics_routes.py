@@ -1,18 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends
-from motor.motor_asyncio import AsyncIOMotorClient
-from typing import List, Dict, Any
-import os
-from datetime import datetime, timedelta
-from collections import Counter
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import List, Dict, Any, Optional
+from datetime import datetime
 import asyncio
+import logging
+import time
+import os
 
 from models import AdminUser
 from auth import get_current_user
+from cache import content_cache
+from counters import read_counters, rebuild_counters, recent_activity
+from database import get_database
 
-# MongoDB connection
-mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ.get('DB_NAME', 'test_database')]
+logger = logging.getLogger(__name__)
 
 # Create analytics router
 analytics_router = APIRouter(prefix="/analytics", tags=["analytics"])
@@ -41,47 +42,110 @@ class AIRecommendation:
         self.category = category
 
 
-@analytics_router.get("/dashboard")
-async def get_analytics_dashboard(current_user: AdminUser = Depends(get_current_user)):
-    """Get comprehensive analytics dashboard with auto-calculated statistics"""
-    
-    try:
-        # Calculer toutes les statistiques en parallèle
-        stats_data = await asyncio.gather(
-            calculate_content_stats(),
-            calculate_engagement_stats(),
-            calculate_technical_stats(),
-            calculate_business_stats(),
-            return_exceptions=True
-        )
-        
-        # Combiner toutes les statistiques
-        all_statistics = []
-        for stat_group in stats_data:
-            if not isinstance(stat_group, Exception):
-                all_statistics.extend(stat_group)
+class AnalyticsSnapshot:
+    """Dashboard data shared by the dashboard, the export and the public statistics.
+
+    A stale snapshot is still served while a background task recomputes it,
+    and concurrent misses all wait on the same computation.
+    """
+
+    def __init__(self, ttl: float = 60.0):
+        self.ttl = ttl
+        self._value: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+        self._refresh: Optional[asyncio.Task] = None
+
+    async def get(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        if self._value is None:
+            return await asyncio.shield(self._start_refresh(db))
+        if time.monotonic() - self._computed_at >= self.ttl:
+            self._start_refresh(db)
+        return self._value
+
+    def invalidate(self):
+        self._computed_at = 0.0
+
+    def refresh_if_stale(self, db: AsyncIOMotorDatabase):
+        """Start a background refresh when the snapshot is missing or past its TTL, without waiting"""
+        if self._value is None or time.monotonic() - self._computed_at >= self.ttl:
+            self._start_refresh(db)
+
+    def _start_refresh(self, db: AsyncIOMotorDatabase) -> asyncio.Task:
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._compute(db))
+            self._refresh.add_done_callback(self._log_failure)
+        return self._refresh
+
+    async def _compute(self, db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+        # Lire tous les compteurs en une seule requête
+        counters = await read_counters(db)
+        all_statistics = calculate_all_stats(counters)
         
         # Générer des recommandations IA
         recommendations = await generate_ai_recommendations(all_statistics)
         
-        return {
+        self._value = {
             "statistics": [stat.__dict__ for stat in all_statistics],
             "recommendations": [rec.__dict__ for rec in recommendations],
             "last_updated": datetime.utcnow().isoformat(),
             "total_stats": len(all_statistics)
         }
+        self._computed_at = time.monotonic()
+        content_cache.bump_version("analytics_snapshot")
+        return self._value
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Analytics snapshot refresh failed: {task.exception()}")
+
+
+analytics_snapshot = AnalyticsSnapshot(ttl=float(os.environ.get("ANALYTICS_SNAPSHOT_TTL_SECONDS", "60")))
+
+
+@analytics_router.get("/dashboard")
+async def get_analytics_dashboard(
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get comprehensive analytics dashboard with auto-calculated statistics"""
+    
+    try:
+        return await analytics_snapshot.get(db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
 
 
-async def calculate_content_stats() -> List[AutoStatistic]:
+@analytics_router.post("/reconcile")
+async def reconcile_analytics_counters(
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Reconstruit les compteurs analytiques à partir des collections sources"""
+    counters = await rebuild_counters(db)
+    analytics_snapshot.invalidate()
+    counters.pop("_id", None)
+    return {"message": "Compteurs reconstruits", "counters": counters}
+
+
+def calculate_all_stats(counters: Dict[str, Any]) -> List[AutoStatistic]:
+    """Calcule toutes les statistiques à partir des compteurs"""
+    return (
+        calculate_content_stats(counters)
+        + calculate_engagement_stats(counters)
+        + calculate_technical_stats(counters)
+        + calculate_business_stats(counters)
+    )
+
+
+def calculate_content_stats(counters: Dict[str, Any]) -> List[AutoStatistic]:
     """Calcule les statistiques de contenu"""
     stats = []
     
     # Nombre de projets
-    projects_count = await db.projects.count_documents({})
-    completed_projects = await db.projects.count_documents({"status": "Terminé"})
+    projects_count = counters.get("projects_total", 0)
+    completed_projects = counters.get("projects_completed", 0)
     
     stats.append(AutoStatistic(
         title="Projets Totaux",
@@ -105,7 +169,7 @@ async def calculate_content_stats() -> List[AutoStatistic]:
         ))
     
     # Articles de blog
-    blog_posts = await db.blog_posts.count_documents({"published": True})
+    blog_posts = counters.get("blog_posts_published", 0)
     stats.append(AutoStatistic(
         title="Articles Publiés",
         value=blog_posts,
@@ -116,7 +180,7 @@ async def calculate_content_stats() -> List[AutoStatistic]:
     ))
     
     # Technologies maîtrisées
-    tech_count = await db.technologies.count_documents({})
+    tech_count = counters.get("technologies_total", 0)
     stats.append(AutoStatistic(
         title="Technologies",
         value=tech_count,
@@ -128,13 +192,13 @@ async def calculate_content_stats() -> List[AutoStatistic]:
     return stats
 
 
-async def calculate_engagement_stats() -> List[AutoStatistic]:
+def calculate_engagement_stats(counters: Dict[str, Any]) -> List[AutoStatistic]:
     """Calcule les statistiques d'engagement"""
     stats = []
     
     # Témoignages
-    testimonials_count = await db.testimonials.count_documents({})
-    pending_testimonials = await db.pending_testimonials.count_documents({"status": "pending"})
+    testimonials_count = counters.get("testimonials_total", 0)
+    pending_testimonials = counters.get("pending_testimonials", 0)
     
     stats.append(AutoStatistic(
         title="Témoignages",
@@ -156,9 +220,8 @@ async def calculate_engagement_stats() -> List[AutoStatistic]:
         ))
     
     # Note moyenne des témoignages
-    testimonials = await db.testimonials.find().to_list(1000)
-    if testimonials:
-        avg_rating = sum(t.get("rating", 0) for t in testimonials) / len(testimonials)
+    if testimonials_count > 0:
+        avg_rating = counters.get("testimonials_rating_sum", 0) / testimonials_count
         stats.append(AutoStatistic(
             title="Note Moyenne",
             value=f"{avg_rating:.1f}",
@@ -170,10 +233,7 @@ async def calculate_engagement_stats() -> List[AutoStatistic]:
         ))
     
     # Ressources téléchargées
-    total_downloads = 0
-    resources = await db.resources.find().to_list(1000)
-    for resource in resources:
-        total_downloads += resource.get("downloads", 0)
+    total_downloads = counters.get("downloads_total", 0)
     
     stats.append(AutoStatistic(
         title="Téléchargements",
@@ -187,13 +247,12 @@ async def calculate_engagement_stats() -> List[AutoStatistic]:
     return stats
 
 
-async def calculate_technical_stats() -> List[AutoStatistic]:
+def calculate_technical_stats(counters: Dict[str, Any]) -> List[AutoStatistic]:
     """Calcule les statistiques techniques"""
     stats = []
     
     # Compétences par niveau
-    skills = await db.skill_categories.find().to_list(1000)
-    total_skills = sum(len(skill.get("items", [])) for skill in skills)
+    total_skills = counters.get("skills_total", 0)
     
     stats.append(AutoStatistic(
         title="Compétences",
@@ -203,11 +262,8 @@ async def calculate_technical_stats() -> List[AutoStatistic]:
         color="#8b5cf6"
     ))
     
-    # Analyse des technologies par catégorie
-    technologies = await db.technologies.find().to_list(1000)
-    tech_by_level = Counter(tech.get("level", "intermediate") for tech in technologies)
-    
-    expert_count = tech_by_level.get("expert", 0)
+    # Technologies de niveau expert
+    expert_count = counters.get("technologies_expert", 0)
     if expert_count > 0:
         stats.append(AutoStatistic(
             title="Niveau Expert",
@@ -219,7 +275,7 @@ async def calculate_technical_stats() -> List[AutoStatistic]:
         ))
     
     # Services proposés
-    services_count = await db.services.count_documents({})
+    services_count = counters.get("services_total", 0)
     stats.append(AutoStatistic(
         title="Services",
         value=services_count,
@@ -231,13 +287,12 @@ async def calculate_technical_stats() -> List[AutoStatistic]:
     return stats
 
 
-async def calculate_business_stats() -> List[AutoStatistic]:
+def calculate_business_stats(counters: Dict[str, Any]) -> List[AutoStatistic]:
     """Calcule les statistiques business"""
     stats = []
     
     # Réservations/bookings
-    bookings_count = await db.bookings.count_documents({})
-    confirmed_bookings = await db.bookings.count_documents({"status": "confirmed"})
+    bookings_count = counters.get("bookings_total", 0)
     
     stats.append(AutoStatistic(
         title="Réservations",
@@ -249,7 +304,7 @@ async def calculate_business_stats() -> List[AutoStatistic]:
     ))
     
     # Devis demandés
-    quotes_count = await db.quotes.count_documents({})
+    quotes_count = counters.get("quotes_total", 0)
     if quotes_count > 0:
         stats.append(AutoStatistic(
             title="Devis Demandés",
@@ -261,7 +316,7 @@ async def calculate_business_stats() -> List[AutoStatistic]:
         ))
     
     # Newsletter subscribers
-    newsletter_count = await db.newsletter_subscriptions.count_documents({"status": "active"})
+    newsletter_count = counters.get("newsletter_active", 0)
     stats.append(AutoStatistic(
         title="Abonnés Newsletter",
         value=newsletter_count,
@@ -271,24 +326,16 @@ async def calculate_business_stats() -> List[AutoStatistic]:
         trend="positive" if newsletter_count > 10 else "neutral"
     ))
     
-    # Activité récente (derniers 30 jours)
-    thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-    recent_activity = 0
-    
-    # Compter l'activité récente dans différentes collections
-    recent_bookings = await db.bookings.count_documents({"created_at": {"$gte": thirty_days_ago}})
-    recent_testimonials = await db.pending_testimonials.count_documents({"submitted_at": {"$gte": thirty_days_ago}})
-    recent_quotes = await db.quotes.count_documents({"created_at": {"$gte": thirty_days_ago}})
-    
-    recent_activity = recent_bookings + recent_testimonials + recent_quotes
+    # Activité récente (derniers 30 jours) : réservations, devis et témoignages soumis
+    activity_count = recent_activity(counters)
     
     stats.append(AutoStatistic(
         title="Activité (30j)",
-        value=recent_activity,
+        value=activity_count,
         description="Interactions clients ce mois",
         icon="TrendingUp",
-        color="#10b981" if recent_activity > 5 else "#f59e0b",
-        trend="positive" if recent_activity > 5 else "neutral"
+        color="#10b981" if activity_count > 5 else "#f59e0b",
+        trend="positive" if activity_count > 5 else "neutral"
     ))
     
     return stats
@@ -395,10 +442,13 @@ async def generate_ai_recommendations(statistics: List[AutoStatistic]) -> List[A
 
 
 @analytics_router.get("/export")
-async def export_analytics_report(current_user: AdminUser = Depends(get_current_user)):
+async def export_analytics_report(
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
     """Exporte un rapport d'analyse complet"""
     
-    dashboard_data = await get_analytics_dashboard(current_user)
+    dashboard_data = await analytics_snapshot.get(db)
     
     # Calculer des métriques supplémentaires pour le rapport
     report = {
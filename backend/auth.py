@@ -1,12 +1,18 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from jose import JWTError, jwt  
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from motor.motor_asyncio import AsyncIOMotorDatabase
+import asyncio
+import time
 import os
 
-from models import AdminUser, Token, TokenData
+from models import AdminUser, TokenData
+from database import get_database
 
 # Security configuration
 SECRET_KEY = os.environ.get("SECRET_KEY", "your-secret-key-change-in-production")
@@ -18,6 +24,56 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # JWT Bearer token scheme
 security = HTTPBearer()
+# Same scheme for routes that only require a token for some requests
+optional_security = HTTPBearer(auto_error=False)
+
+
+class PrincipalCache:
+    """Bounded LRU cache of resolved admin users keyed by bearer token.
+
+    Entries live until the token's ``exp`` claim. Anything that changes a
+    user (password, profile, deactivation) must call ``invalidate_user``.
+    """
+
+    def __init__(self, max_size: int = 256):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[AdminUser, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[AdminUser]:
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return user
+
+    def set(self, token: str, user: AdminUser, expires_at: float):
+        self._entries[token] = (user, expires_at)
+        self._entries.move_to_end(token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: str):
+        stale = [token for token, (user, _) in self._entries.items() if user.id == user_id]
+        for token in stale:
+            del self._entries[token]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+
+principal_cache = PrincipalCache(int(os.environ.get("PRINCIPAL_CACHE_MAX_SIZE", "256")))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -30,6 +86,86 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+class HashingExecutor:
+    """Runs bcrypt work on a dedicated thread pool so it never blocks the event loop.
+
+    At most ``workers`` hashes run at once and at most ``queue_limit`` wait
+    behind them; anything beyond that is rejected immediately with a 503.
+    """
+
+    def __init__(self, workers: int = 2, queue_limit: int = 16):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+        self.total_wait_seconds = 0.0
+
+    async def run(self, func, *args):
+        if self.pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        
+        def timed():
+            started = time.perf_counter()
+            result = func(*args)
+            return result, started, time.perf_counter() - started
+        
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, elapsed = await loop.run_in_executor(self._executor, timed)
+        finally:
+            self.pending -= 1
+        
+        self.completed += 1
+        self.total_hash_seconds += elapsed
+        self.total_wait_seconds += started - submitted
+        self.max_hash_seconds = max(self.max_hash_seconds, elapsed)
+        return result
+
+    def stats(self) -> dict:
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": min(self.pending, self.workers),
+            "queue_depth": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_hash_ms": round(self.total_hash_seconds / completed * 1000, 2),
+            "max_hash_ms": round(self.max_hash_seconds * 1000, 2),
+            "avg_wait_ms": round(self.total_wait_seconds / completed * 1000, 2),
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+hashing_executor = HashingExecutor(
+    workers=int(os.environ.get("HASH_WORKERS", "2")),
+    queue_limit=int(os.environ.get("HASH_QUEUE_LIMIT", "16")),
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing executor"""
+    return await hashing_executor.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password on the hashing executor"""
+    return await hashing_executor.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -56,30 +192,31 @@ def verify_token(token: str) -> TokenData:
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
+        token_data = TokenData(username=username, exp=payload.get("exp"))
     except JWTError:
         raise credentials_exception
     
     return token_data
 
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> AdminUser:
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> AdminUser:
     """Get the current authenticated user from JWT token"""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    
-    # MongoDB connection
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'test_database')]
-    
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    token = credentials.credentials
+    cached_user = principal_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+    
     try:
-        token_data = verify_token(credentials.credentials)
+        token_data = verify_token(token)
         user = await db.admin_users.find_one({"username": token_data.username})
         if user is None:
             raise credentials_exception
@@ -91,68 +228,47 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Inactive user"
             )
+        
+        if token_data.exp is not None:
+            principal_cache.set(token, admin_user, float(token_data.exp))
             
         return admin_user
         
     except JWTError:
         raise credentials_exception
-    finally:
-        client.close()
 
 
-async def authenticate_user(username: str, password: str) -> Optional[AdminUser]:
+async def authenticate_user(db: AsyncIOMotorDatabase, username: str, password: str) -> Optional[AdminUser]:
     """Authenticate a user with username and password"""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    
-    # MongoDB connection
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'test_database')]
-    
-    try:
-        user = await db.admin_users.find_one({"username": username})
-        if not user:
-            return None
-            
-        admin_user = AdminUser(**user)
-        if not verify_password(password, admin_user.hashed_password):
-            return None
-            
-        return admin_user
+    user = await db.admin_users.find_one({"username": username})
+    if not user:
+        return None
         
-    finally:
-        client.close()
+    admin_user = AdminUser(**user)
+    if not await verify_password_async(password, admin_user.hashed_password):
+        return None
+        
+    return admin_user
 
 
-async def create_default_admin_user():
+async def create_default_admin_user(db: AsyncIOMotorDatabase):
     """Create a default admin user if none exists"""
-    from motor.motor_asyncio import AsyncIOMotorClient
+    # Check if any admin user exists
+    existing_admin = await db.admin_users.find_one()
+    if existing_admin:
+        print("ℹ️ Admin user already exists")
+        return
     
-    # MongoDB connection
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'test_database')]
+    # Create default admin user
+    default_admin = AdminUser(
+        username="admin",
+        email="admin@jeanyves.dev",
+        hashed_password=await get_password_hash_async("admin123"),  # Change this in production!
+        is_active=True
+    )
     
-    try:
-        # Check if any admin user exists
-        existing_admin = await db.admin_users.find_one()
-        if existing_admin:
-            print("ℹ️ Admin user already exists")
-            return
-        
-        # Create default admin user
-        default_admin = AdminUser(
-            username="admin",
-            email="admin@jeanyves.dev",
-            hashed_password=get_password_hash("admin123"),  # Change this in production!
-            is_active=True
-        )
-        
-        await db.admin_users.insert_one(default_admin.dict())
-        print("✅ Default admin user created:")
-        print("   Username: admin")
-        print("   Password: admin123")
-        print("   ⚠️  Please change the password in production!")
-        
-    finally:
-        client.close()
\ No newline at end of file
+    await db.admin_users.insert_one(default_admin.dict())
+    print("✅ Default admin user created:")
+    print("   Username: admin")
+    print("   Password: admin123")
+    print("   ⚠️  Please change the password in production!")
\ No newline at end of file
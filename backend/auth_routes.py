@@ -1,18 +1,19 @@
 from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.security import HTTPBearer
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from datetime import timedelta, datetime
 
 from models import AdminLogin, Token, AdminUser, AdminUserCreate, PasswordChange, AdminUpdate
-from auth import authenticate_user, create_access_token, get_current_user, create_default_admin_user, get_password_hash
+from auth import authenticate_user, create_access_token, get_current_user, create_default_admin_user, get_password_hash_async, verify_password_async, principal_cache
+from database import get_database
 
 # Create auth router
 auth_router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
 @auth_router.post("/login", response_model=Token)
-async def login(login_data: AdminLogin):
+async def login(login_data: AdminLogin, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Login endpoint for admin users"""
-    user = await authenticate_user(login_data.username, login_data.password)
+    user = await authenticate_user(db, login_data.username, login_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -21,20 +22,10 @@ async def login(login_data: AdminLogin):
         )
     
     # Update last login time
-    from motor.motor_asyncio import AsyncIOMotorClient
-    import os
-    
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'test_database')]
-    
-    try:
-        await db.admin_users.update_one(
-            {"id": user.id},
-            {"$set": {"last_login": datetime.utcnow()}}
-        )
-    finally:
-        client.close()
+    await db.admin_users.update_one(
+        {"id": user.id},
+        {"$set": {"last_login": datetime.utcnow()}}
+    )
     
     # Create access token
     access_token_expires = timedelta(minutes=60)
@@ -54,148 +45,146 @@ async def read_users_me(current_user: AdminUser = Depends(get_current_user)):
 @auth_router.post("/create-admin", response_model=AdminUser)
 async def create_admin_user(
     admin_data: AdminUserCreate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create a new admin user (requires authentication)"""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    import os
-    
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'test_database')]
+    # Check if username already exists
+    existing_user = await db.admin_users.find_one({"username": admin_data.username})
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already exists"
+        )
     
-    try:
-        # Check if username already exists
-        existing_user = await db.admin_users.find_one({"username": admin_data.username})
-        if existing_user:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Username already exists"
-            )
-        
-        # Check if email already exists
-        existing_email = await db.admin_users.find_one({"email": admin_data.email})
-        if existing_email:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already exists"
-            )
-        
-        # Create new admin user
-        new_admin = AdminUser(
-            username=admin_data.username,
-            email=admin_data.email,
-            hashed_password=get_password_hash(admin_data.password),
-            is_active=True
+    # Check if email already exists
+    existing_email = await db.admin_users.find_one({"email": admin_data.email})
+    if existing_email:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already exists"
         )
-        
-        await db.admin_users.insert_one(new_admin.dict())
-        return new_admin
-        
-    finally:
-        client.close()
+    
+    # Create new admin user
+    new_admin = AdminUser(
+        username=admin_data.username,
+        email=admin_data.email,
+        hashed_password=await get_password_hash_async(admin_data.password),
+        is_active=True
+    )
+    
+    await db.admin_users.insert_one(new_admin.dict())
+    return new_admin
 
 
 @auth_router.post("/change-password")
 async def change_password(
     password_data: PasswordChange,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Change current user's password"""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    from auth import verify_password
-    import os
+    # Verify current password
+    if not await verify_password_async(password_data.current_password, current_user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Current password is incorrect"
+        )
     
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'test_database')]
+    # Update password
+    new_hashed_password = await get_password_hash_async(password_data.new_password)
+    await db.admin_users.update_one(
+        {"id": current_user.id},
+        {"$set": {"hashed_password": new_hashed_password}}
+    )
+    principal_cache.invalidate_user(current_user.id)
     
-    try:
-        # Verify current password
-        if not verify_password(password_data.current_password, current_user.hashed_password):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Current password is incorrect"
-            )
-        
-        # Update password
-        new_hashed_password = get_password_hash(password_data.new_password)
-        await db.admin_users.update_one(
-            {"id": current_user.id},
-            {"$set": {"hashed_password": new_hashed_password}}
-        )
-        
-        return {"message": "Password changed successfully"}
-        
-    finally:
-        client.close()
+    return {"message": "Password changed successfully"}
 
 
 @auth_router.put("/update-profile", response_model=AdminUser)
 async def update_admin_profile(
     profile_data: AdminUpdate,
-    current_user: AdminUser = Depends(get_current_user)
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update current user's profile information"""
-    from motor.motor_asyncio import AsyncIOMotorClient
-    import os
+    update_data = {}
     
-    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
-    client = AsyncIOMotorClient(mongo_url)
-    db = client[os.environ.get('DB_NAME', 'test_database')]
+    # Check if username is being updated and if it's unique
+    if profile_data.username and profile_data.username != current_user.username:
+        existing_user = await db.admin_users.find_one({
+            "username": profile_data.username,
+            "id": {"$ne": current_user.id}
+        })
+        if existing_user:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username already exists"
+            )
+        update_data["username"] = profile_data.username
     
-    try:
-        update_data = {}
-        
-        # Check if username is being updated and if it's unique
-        if profile_data.username and profile_data.username != current_user.username:
-            existing_user = await db.admin_users.find_one({
-                "username": profile_data.username,
-                "id": {"$ne": current_user.id}
-            })
-            if existing_user:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Username already exists"
-                )
-            update_data["username"] = profile_data.username
-        
-        # Check if email is being updated and if it's unique
-        if profile_data.email and profile_data.email != current_user.email:
-            existing_email = await db.admin_users.find_one({
-                "email": profile_data.email,
-                "id": {"$ne": current_user.id}
-            })
-            if existing_email:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Email already exists"
-                )
-            update_data["email"] = profile_data.email
-        
-        if not update_data:
+    # Check if email is being updated and if it's unique
+    if profile_data.email and profile_data.email != current_user.email:
+        existing_email = await db.admin_users.find_one({
+            "email": profile_data.email,
+            "id": {"$ne": current_user.id}
+        })
+        if existing_email:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="No changes provided"
+                detail="Email already exists"
             )
-        
-        # Update user profile
-        update_data["updated_at"] = datetime.utcnow()
-        await db.admin_users.update_one(
-            {"id": current_user.id},
-            {"$set": update_data}
+        update_data["email"] = profile_data.email
+    
+    if not update_data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No changes provided"
         )
-        
-        # Return updated user
-        updated_user = await db.admin_users.find_one({"id": current_user.id})
-        return AdminUser(**updated_user)
-        
-    finally:
-        client.close()
+    
+    # Update user profile
+    update_data["updated_at"] = datetime.utcnow()
+    await db.admin_users.update_one(
+        {"id": current_user.id},
+        {"$set": update_data}
+    )
+    principal_cache.invalidate_user(current_user.id)
+    
+    # Return updated user
+    updated_user = await db.admin_users.find_one({"id": current_user.id})
+    return AdminUser(**updated_user)
+
+
+@auth_router.put("/users/{user_id}/deactivate")
+async def deactivate_admin_user(
+    user_id: str,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Deactivate another admin user (requires authentication)"""
+    if user_id == current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You cannot deactivate your own account"
+        )
+    
+    result = await db.admin_users.update_one(
+        {"id": user_id},
+        {"$set": {"is_active": False}}
+    )
+    if result.matched_count == 0:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    principal_cache.invalidate_user(user_id)
+    
+    return {"message": "User deactivated successfully"}
 
 
 @auth_router.post("/init-admin")
-async def initialize_admin():
+async def initialize_admin(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Initialize default admin user (public endpoint for first setup)"""
-    await create_default_admin_user()
+    await create_default_admin_user(db)
     return {"message": "Admin initialization completed"}
\ No newline at end of file
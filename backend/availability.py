@@ -0,0 +1,155 @@
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Any, Dict, List
+from datetime import date, datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bookable time slots; a day's reservations are a bitmap over this list
+SLOTS = [
+    '09:00', '09:30', '10:00', '10:30', '11:00', '11:30',
+    '14:00', '14:30', '15:00', '15:30', '16:00', '16:30', '17:00'
+]
+SLOT_BITS = {slot: 1 << index for index, slot in enumerate(SLOTS)}
+FULL_DAY = (1 << len(SLOTS)) - 1
+
+# Longest range answered by one availability request
+MAX_RANGE_DAYS = 62
+
+# Bookings hold their slot while "reserved" is true (every status but cancelled).
+# The unique partial index on (slot_date, booking_data.time) over reserved bookings
+# is what prevents double booking; see indexes.INDEX_REGISTRY.
+CANCELLED_STATUS = "cancelled"
+
+
+def parse_day(value: str) -> datetime:
+    """Booking date (``YYYY-MM-DD`` or a full ISO timestamp) as a midnight datetime"""
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail=f"Invalid date: {value}")
+
+
+def slot_fields(booking_date: str, time: str, status: str) -> Dict[str, Any]:
+    """Stored fields reserving ``time`` on ``booking_date``"""
+    if time not in SLOT_BITS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid time slot. Allowed: {', '.join(SLOTS)}"
+        )
+    return {"slot_date": parse_day(booking_date), "reserved": status != CANCELLED_STATUS}
+
+
+def slot_bitmap(times: List[str]) -> int:
+    mask = 0
+    for time in times:
+        mask |= SLOT_BITS.get(time, 0)
+    return mask
+
+
+def slots_from_bitmap(mask: int) -> List[str]:
+    return [slot for slot in SLOTS if mask & SLOT_BITS[slot]]
+
+
+def day_availability(day: date, booked_mask: int) -> Dict[str, Any]:
+    return {
+        "date": day.isoformat(),
+        "booked_mask": booked_mask,
+        "available_slots": slots_from_bitmap(FULL_DAY & ~booked_mask),
+        "booked_slots": slots_from_bitmap(booked_mask),
+    }
+
+
+async def booked_bitmaps(db: AsyncIOMotorDatabase, start: datetime, end: datetime) -> Dict[date, int]:
+    """Reserved slots per day in [start, end], in one query covered by the slot index"""
+    bookings = db.bookings.find(
+        {"slot_date": {"$gte": start, "$lte": end}, "reserved": True},
+        {"_id": 0, "slot_date": 1, "booking_data.time": 1}
+    )
+    bitmaps: Dict[date, int] = {}
+    async for booking in bookings:
+        day = booking["slot_date"].date()
+        bitmaps[day] = bitmaps.get(day, 0) | SLOT_BITS.get(booking["booking_data"]["time"], 0)
+    return bitmaps
+
+
+async def availability_range(db: AsyncIOMotorDatabase, start_day: str, end_day: str) -> Dict[str, Any]:
+    """Availability of every day between ``start_day`` and ``end_day`` included"""
+    start, end = parse_day(start_day), parse_day(end_day)
+    days = (end - start).days + 1
+    if days < 1 or days > MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Date range must cover 1 to {MAX_RANGE_DAYS} days"
+        )
+
+    bitmaps = await booked_bitmaps(db, start, end)
+    return {
+        "from": start.date().isoformat(),
+        "to": end.date().isoformat(),
+        "slots": SLOTS,
+        "days": [
+            day_availability(day, bitmaps.get(day, 0))
+            for day in (start.date() + timedelta(days=offset) for offset in range(days))
+        ],
+    }
+
+
+async def backfill_booking_slots(db: AsyncIOMotorDatabase) -> int:
+    """Add slot_date/reserved to bookings created before the availability engine.
+
+    A booking whose date cannot be parsed gets ``slot_date: null`` and is not
+    reserved: it holds no slot, and two of them at the same time would
+    otherwise collide in the unique slot index. Bookings backfilled that way
+    by an earlier version are repaired too.
+    """
+    result = await db.bookings.update_many(
+        {"$or": [
+            {"slot_date": {"$exists": False}},
+            {"slot_date": None, "reserved": True},
+        ]},
+        [
+            {"$set": {
+                "slot_date": {"$dateFromString": {
+                    "dateString": {"$substrBytes": ["$booking_data.date", 0, 10]},
+                    "format": "%Y-%m-%d",
+                    "onError": None,
+                }},
+            }},
+            {"$set": {
+                "reserved": {"$and": [
+                    {"$ne": ["$status", CANCELLED_STATUS]},
+                    {"$eq": [{"$type": "$slot_date"}, "date"]},
+                ]},
+            }},
+        ]
+    )
+    if result.modified_count:
+        logger.info(f"Backfilled slot fields on {result.modified_count} bookings")
+    return result.modified_count
+
+
+async def resolve_slot_conflicts(db: AsyncIOMotorDatabase) -> int:
+    """Release double-booked slots so the unique slot index can be built.
+
+    The oldest booking of each slot keeps it; the later ones get
+    ``reserved: false`` and ``slot_conflict: true`` so they can be followed up
+    with the client.
+    """
+    groups = db.bookings.aggregate([
+        {"$match": {"reserved": True}},
+        {"$sort": {"created_at": 1, "id": 1}},
+        {"$group": {"_id": {"slot_date": "$slot_date", "time": "$booking_data.time"}, "ids": {"$push": "$id"}}},
+        {"$match": {"ids.1": {"$exists": True}}},
+    ], allowDiskUse=True)
+    later = [booking_id async for group in groups for booking_id in group["ids"][1:]]
+    if not later:
+        return 0
+
+    await db.bookings.update_many(
+        {"id": {"$in": later}},
+        {"$set": {"reserved": False, "slot_conflict": True, "updated_at": datetime.utcnow()}}
+    )
+    logger.warning(f"Released {len(later)} double-booked slots, flagged with slot_conflict: {', '.join(later)}")
+    return len(later)
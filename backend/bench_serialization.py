@@ -0,0 +1,95 @@
+"""Microbenchmark of the read serialization paths.
+
+Compares, per list endpoint, the previous path (validated model per document,
+response_model re-validation, JSONResponse) with ``trusted_response``
+(model_construct + orjson). No database is needed:
+
+    python bench_serialization.py [documents] [rounds]
+"""
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from bson import ObjectId
+from typing import Any, Dict, List
+import asyncio
+import sys
+import time
+
+from models import BlogPost, Project
+from serialization import trusted_response
+from server import Booking, ContactMessage, Quote
+
+
+def sample_documents(count: int) -> Dict[str, tuple]:
+    """Documents shaped like what the list endpoints read from MongoDB"""
+    def stored(model, **fields) -> Dict[str, Any]:
+        return {"_id": ObjectId(), **model(**fields).dict()}
+
+    contact = {"name": "Client", "email": "client@example.com", "company": "ACME", "phone": "+33600000000"}
+    return {
+        "GET /admin/projects": (Project, [stored(
+            Project, title=f"Projet {i}", category="Python", level="Avancé",
+            description="Outil d'audit réseau " * 8, technologies=["Python", "Scapy", "FastAPI"],
+            features=["Scan", "Rapport PDF", "API"], status="Terminé", duration="3 mois", order_index=i
+        ) for i in range(count)]),
+        "GET /admin/blog": (BlogPost, [stored(
+            BlogPost, title=f"Article {i}", slug=f"article-{i}", excerpt="Résumé " * 10,
+            content="Contenu de l'article. " * 200, category="Cybersécurité", tags=["owasp", "python"],
+            published=True
+        ) for i in range(count)]),
+        "GET /api/quotes": (Quote, [stored(
+            Quote, quote_data={
+                "project_type": "web", "complexity": "medium", "timeline": "normal",
+                "features": ["auth", "dashboard"], "base_price": 1500, "features_price": 800,
+                "extras_price": 200, "total_price": 2500, "min_price": 2000, "max_price": 3000,
+            }, contact_info=contact
+        ) for i in range(count)]),
+        "GET /api/bookings": (Booking, [stored(
+            Booking, booking_data={
+                "service_id": "audit", "service_name": "Audit", "date": "2025-01-15",
+                "time": "10:00", "duration": "1h",
+            }, contact_info=contact
+        ) for i in range(count)]),
+        "GET /api/contact": (ContactMessage, [stored(
+            ContactMessage, name="Client", email="client@example.com", subject=f"Demande {i}",
+            message="Bonjour, " * 40
+        ) for i in range(count)]),
+    }
+
+
+async def previous_path(model, documents: List[Dict[str, Any]], field) -> bytes:
+    content = await serialize_response(field=field, response_content=[model(**document) for document in documents])
+    return JSONResponse(content).body
+
+
+def trusted_path(model, documents: List[Dict[str, Any]]) -> bytes:
+    return trusted_response(model, documents).body
+
+
+async def main(count: int, rounds: int):
+    print(f"{count} documents per response, best of {rounds} rounds")
+    print(f"{'endpoint':<22}{'previous ms':>14}{'trusted ms':>14}{'speedup':>10}")
+    for endpoint, (model, documents) in sample_documents(count).items():
+        field = create_response_field(name="response", type_=List[model])
+
+        previous = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            await previous_path(model, documents, field)
+            previous.append(time.perf_counter() - started)
+
+        trusted = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            trusted_path(model, documents)
+            trusted.append(time.perf_counter() - started)
+
+        best_previous, best_trusted = min(previous) * 1000, min(trusted) * 1000
+        print(f"{endpoint:<22}{best_previous:>14.2f}{best_trusted:>14.2f}{best_previous / best_trusted:>9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(
+        count=int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+        rounds=int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+    ))
@@ -0,0 +1,271 @@
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import DESCENDING, UpdateOne
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Event streams stored as bucket documents per hour instead of one document per event.
+# Each bucket carries its own count so rollups never have to open the event arrays.
+DOWNLOAD_BUCKETS = "resource_download_buckets"
+STATUS_CHECK_BUCKETS = "status_check_buckets"
+
+# Legacy one-document-per-event collections converted by migrate_event_buckets
+LEGACY_DOWNLOADS = "resource_downloads"
+LEGACY_STATUS_CHECKS = "status_checks"
+
+# Events per bucket: a full bucket rolls over to a new one for the same hour, so a busy
+# hour can never push a document towards MongoDB's 16 MB limit
+BUCKET_MAX_EVENTS = 1000
+
+# Rollups without a ``from`` cover this much history, and never return more buckets than this
+ROLLUP_DEFAULT_WINDOW = timedelta(days=7)
+ROLLUP_MAX_BUCKETS = 5000
+
+
+def bucket_hour(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_key(hour: datetime) -> str:
+    return hour.strftime("%Y-%m-%dT%H")
+
+
+def download_bucket_id(resource_id: str, hour: datetime) -> str:
+    return f"{resource_id}:{_hour_key(hour)}"
+
+
+def status_bucket_id(hour: datetime) -> str:
+    return _hour_key(hour)
+
+
+def _append(bucket_id: str, key: Dict[str, Any], array_field: str, events: List[Dict[str, Any]],
+            time_field: str) -> UpdateOne:
+    """Upsert appending ``events`` to an open bucket for ``key`` and keeping its count and time range.
+
+    Only a bucket with room for all of ``events`` matches; once the hour's
+    buckets are full the upsert starts a new one, identified by ``bucket_id``
+    and the id of its first event. ``events`` must not exceed BUCKET_MAX_EVENTS.
+    """
+    times = [event[time_field] for event in events]
+    return UpdateOne(
+        {**key, "count": {"$lte": BUCKET_MAX_EVENTS - len(events)}},
+        {
+            "$setOnInsert": {"id": f"{bucket_id}:{events[0]['id']}"},
+            "$push": {array_field: {"$each": events}},
+            "$inc": {"count": len(events)},
+            "$min": {"first_at": min(times)},
+            "$max": {"last_at": max(times)},
+        },
+        upsert=True
+    )
+
+
+def group_downloads(events: List[Dict[str, Any]]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """Group ``ResourceDownload`` dicts by the bucket they belong to, at most BUCKET_MAX_EVENTS per group"""
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for event in events:
+        bucket_id = download_bucket_id(event["resource_id"], bucket_hour(event["downloaded_at"]))
+        grouped.setdefault(bucket_id, []).append(event)
+    return [
+        (bucket_id, group[offset:offset + BUCKET_MAX_EVENTS])
+        for bucket_id, group in grouped.items()
+        for offset in range(0, len(group), BUCKET_MAX_EVENTS)
+    ]
+
+
+def download_bucket_update(bucket_id: str, events: List[Dict[str, Any]]) -> UpdateOne:
+    first = events[0]
+    return _append(
+        bucket_id,
+        {"resource_id": first["resource_id"], "hour": bucket_hour(first["downloaded_at"])},
+        "events",
+        [{key: value for key, value in event.items() if key != "resource_id"} for event in events],
+        "downloaded_at"
+    )
+
+
+def status_check_update(check: Dict[str, Any]) -> UpdateOne:
+    hour = bucket_hour(check["timestamp"])
+    return _append(status_bucket_id(hour), {"hour": hour}, "checks", [check], "timestamp")
+
+
+async def record_status_check(db: AsyncIOMotorDatabase, check: Dict[str, Any]):
+    """Append one ``StatusCheck`` dict to its hourly bucket"""
+    await db[STATUS_CHECK_BUCKETS].bulk_write([status_check_update(check)])
+
+
+def hour_range(start: Optional[datetime], end: Optional[datetime]) -> Dict[str, Any]:
+    bounds: Dict[str, Any] = {}
+    if start:
+        bounds["$gte"] = bucket_hour(start)
+    if end:
+        bounds["$lte"] = end
+    return {"hour": bounds} if bounds else {}
+
+
+def _events_in_range(array_field: str, time_field: str, start: Optional[datetime],
+                     end: Optional[datetime]) -> Dict[str, Any]:
+    """Expression keeping the events of a bucket that fall inside [start, end]"""
+    conditions = []
+    if start:
+        conditions.append({"$gte": [f"$$event.{time_field}", start]})
+    if end:
+        conditions.append({"$lte": [f"$$event.{time_field}", end]})
+    if not conditions:
+        return {"$ifNull": [f"${array_field}", []]}
+    return {"$filter": {"input": f"${array_field}", "as": "event", "cond": {"$and": conditions}}}
+
+
+def unwind_pipeline(
+    array_field: str,
+    time_field: str,
+    filter: Optional[Dict[str, Any]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    carry: Tuple[str, ...] = ()
+) -> List[Dict[str, Any]]:
+    """Pipeline turning buckets back into individual events, newest first.
+
+    ``carry`` names bucket fields copied onto every event (e.g. ``resource_id``).
+    """
+    return [
+        {"$match": {**(filter or {}), **hour_range(start, end)}},
+        {"$sort": {"hour": -1}},
+        # Events are appended in arrival order, so reversing each bucket avoids a blocking sort
+        {"$project": {"_id": 0, **{field: 1 for field in carry},
+                      array_field: {"$reverseArray": _events_in_range(array_field, time_field, start, end)}}},
+        {"$unwind": f"${array_field}"},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": [
+            {field: f"${field}" for field in carry}, f"${array_field}"
+        ]}}},
+    ]
+
+
+async def recent_events(
+    collection: AsyncIOMotorCollection,
+    array_field: str,
+    time_field: str,
+    limit: int,
+    filter: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """Newest ``limit`` events, reading buckets newest first until enough are collected.
+
+    An hour can span several buckets, so its remaining buckets are still read
+    once ``limit`` is reached.
+    """
+    events: List[Dict[str, Any]] = []
+    cursor = collection.find(filter or {}, {"_id": 0, "hour": 1, array_field: 1}).sort("hour", DESCENDING)
+    last_hour = None
+    async for bucket in cursor:
+        if len(events) >= limit and bucket["hour"] != last_hour:
+            await cursor.close()
+            break
+        events.extend(bucket.get(array_field, []))
+        last_hour = bucket["hour"]
+    events.sort(key=lambda event: event[time_field], reverse=True)
+    return events[:limit]
+
+
+async def hourly_rollup(
+    collection: AsyncIOMotorCollection,
+    filter: Optional[Dict[str, Any]] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    fields: Tuple[str, ...] = ()
+) -> List[Dict[str, Any]]:
+    """Event counts per hour summed from the bucket counters, without opening the event arrays.
+
+    Without ``start`` only the ``ROLLUP_DEFAULT_WINDOW`` before ``end`` (or now)
+    is read, and at most the newest ``ROLLUP_MAX_BUCKETS`` rows are returned.
+    """
+    if start is None:
+        start = (end or datetime.utcnow()) - ROLLUP_DEFAULT_WINDOW
+    group_key = {"hour": "$hour", **{field: f"${field}" for field in fields}}
+    pipeline = [
+        {"$match": {**(filter or {}), **hour_range(start, end)}},
+        {"$group": {"_id": group_key, "count": {"$sum": "$count"}}},
+        {"$sort": {"_id.hour": -1}},
+        {"$limit": ROLLUP_MAX_BUCKETS},
+        {"$project": {"_id": 0, "count": 1, **{field: f"$_id.{field}" for field in group_key}}},
+    ]
+    return await collection.aggregate(pipeline).to_list(None)
+
+
+def _legacy_to_buckets(array_field: str, time_field: str, event_fields: Tuple[str, ...],
+                       group_fields: Tuple[str, ...], bucket_id: Dict[str, Any],
+                       target: str) -> List[Dict[str, Any]]:
+    """Server-side pipeline folding legacy event documents into hourly buckets.
+
+    Re-running it is safe: events already present in a bucket are skipped.
+    """
+    hour = {"$dateFromParts": {
+        "year": {"$year": f"${time_field}"},
+        "month": {"$month": f"${time_field}"},
+        "day": {"$dayOfMonth": f"${time_field}"},
+        "hour": {"$hour": f"${time_field}"},
+    }}
+    return [
+        {"$set": {"hour": hour}},
+        {"$group": {
+            "_id": {**{field: f"${field}" for field in group_fields}, "hour": "$hour"},
+            array_field: {"$push": {field: f"${field}" for field in event_fields}},
+            "first_at": {"$min": f"${time_field}"},
+            "last_at": {"$max": f"${time_field}"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "id": bucket_id,
+            **{field: f"$_id.{field}" for field in group_fields},
+            "hour": "$_id.hour",
+            array_field: 1,
+            "count": {"$size": f"${array_field}"},
+            "first_at": 1,
+            "last_at": 1,
+        }},
+        {"$merge": {
+            "into": target,
+            "on": "id",
+            "whenMatched": [
+                {"$set": {array_field: {"$concatArrays": [
+                    f"${array_field}",
+                    {"$filter": {
+                        "input": f"$$new.{array_field}",
+                        "cond": {"$not": {"$in": ["$$this.id", f"${array_field}.id"]}},
+                    }},
+                ]}}},
+                {"$set": {
+                    "count": {"$size": f"${array_field}"},
+                    "first_at": {"$min": ["$first_at", "$$new.first_at"]},
+                    "last_at": {"$max": ["$last_at", "$$new.last_at"]},
+                }},
+            ],
+            "whenNotMatched": "insert",
+        }},
+    ]
+
+
+async def migrate_event_buckets(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Fold the legacy per-event collections into hourly buckets, then drop them"""
+    hour_key = {"$dateToString": {"format": "%Y-%m-%dT%H", "date": "$_id.hour"}}
+    migrations = [
+        (LEGACY_DOWNLOADS, _legacy_to_buckets(
+            "events", "downloaded_at", ("id", "user_email", "ip_address", "downloaded_at"), ("resource_id",),
+            {"$concat": ["$_id.resource_id", ":", hour_key]}, DOWNLOAD_BUCKETS
+        )),
+        (LEGACY_STATUS_CHECKS, _legacy_to_buckets(
+            "checks", "timestamp", ("id", "client_name", "timestamp"), (),
+            hour_key, STATUS_CHECK_BUCKETS
+        )),
+    ]
+
+    report = {}
+    for source, pipeline in migrations:
+        migrated = await db[source].count_documents({})
+        if migrated:
+            await db[source].aggregate(pipeline).to_list(None)
+            await db[source].drop()
+            logger.info(f"Migrated {migrated} documents from {source} into hourly buckets")
+        report[source] = migrated
+    return report
@@ -0,0 +1,126 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import hashlib
+import time
+import uuid
+import os
+
+
+class ContentCache:
+    """In-memory cache of public content stamped with per-collection versions.
+
+    Every admin write calls ``bump_version`` for the collection it touched,
+    so cached reads are served from memory until the data actually changes.
+    ``ttl`` is only a safety net for writes made outside this process.
+    Entries are kept in an LRU bounded by ``max_entries``, and misses
+    (``find_one`` returning None) are never stored.
+    """
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        # Versions restart at zero with the process, so ETags are salted per process
+        self._epoch = uuid.uuid4().hex
+        self._versions: Dict[str, int] = defaultdict(int)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[int, float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def version(self, collection: str) -> int:
+        return self._versions[collection]
+
+    def bump_version(self, collection: str):
+        self._versions[collection] += 1
+
+    def get(self, collection: str, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get((collection, key))
+        if entry is not None:
+            version, stored_at, value = entry
+            if version == self._versions[collection] and time.monotonic() - stored_at < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end((collection, key))
+                return True, value
+        self.misses += 1
+        return False, None
+
+    def set(self, collection: str, key: str, version: int, value: Any):
+        previous = self._entries.get((collection, key))
+        if previous is not None and previous[0] == version == self._versions[collection] and previous[2] != value:
+            # The TTL reload picked up a write made outside this process
+            self.bump_version(collection)
+            version = self._versions[collection]
+        self._entries[(collection, key)] = (version, time.monotonic(), value)
+        self._entries.move_to_end((collection, key))
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def etag(self, collections: Iterable[str], salt: str = "") -> str:
+        """Strong ETag derived from the current versions of ``collections``.
+
+        The TTL window is mixed in so clients revalidating forever still pick
+        up writes made outside this process once the cached entries expire.
+        """
+        digest = hashlib.sha1(f"{self._epoch}|{int(time.time() // self.ttl)}".encode())
+        for collection in sorted(collections):
+            digest.update(f"|{collection}:{self._versions[collection]}".encode())
+        digest.update(salt.encode())
+        return f'"{digest.hexdigest()[:24]}"'
+
+    async def find(
+        self,
+        db: AsyncIOMotorDatabase,
+        collection: str,
+        filter: Optional[Dict[str, Any]] = None,
+        sort: Optional[List[Tuple[str, int]]] = None,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Cached ``find`` returning documents without ``_id``"""
+        key = repr(("find", filter, sort, limit))
+        found, value = self.get(collection, key)
+        if found:
+            return value
+
+        version = self.version(collection)
+        cursor = db[collection].find(filter or {}, {"_id": 0})
+        if sort:
+            cursor = cursor.sort(sort)
+        documents = await cursor.to_list(limit)
+        self.set(collection, key, version, documents)
+        return documents
+
+    async def find_one(
+        self,
+        db: AsyncIOMotorDatabase,
+        collection: str,
+        filter: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Cached ``find_one`` returning the document without ``_id``"""
+        key = repr(("find_one", filter))
+        found, value = self.get(collection, key)
+        if found:
+            return value
+
+        version = self.version(collection)
+        document = await db[collection].find_one(filter or {}, {"_id": 0})
+        if document is not None:
+            self.set(collection, key, version, document)
+        return document
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evicted": self.evicted,
+            "hits": self.hits,
+            "misses": self.misses,
+            "versions": dict(self._versions),
+        }
+
+
+content_cache = ContentCache(
+    ttl=float(os.environ.get("PUBLIC_CACHE_TTL_SECONDS", "300")),
+    max_entries=int(os.environ.get("PUBLIC_CACHE_MAX_ENTRIES", "1000")),
+)
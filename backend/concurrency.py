@@ -0,0 +1,170 @@
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import os
+
+from metrics import registry
+
+pool_active = registry.gauge(
+    "concurrency_pool_active", "Requests running in each route class pool", ("pool",)
+)
+pool_waiting = registry.gauge(
+    "concurrency_pool_waiting", "Requests queued for each route class pool", ("pool",)
+)
+pool_saturation = registry.gauge(
+    "concurrency_pool_saturation", "Running plus queued requests over pool capacity; 1 means shedding", ("pool",)
+)
+pool_rejected = registry.counter(
+    "concurrency_pool_rejected_total", "Requests shed with a 503 by each pool", ("pool", "reason")
+)
+
+
+class ConcurrencyPool:
+    """Bounds how many requests of one route class run at once.
+
+    At most ``limit`` requests run and at most ``queue_limit`` wait behind
+    them for up to ``queue_timeout_ms``; anything beyond that is shed with a
+    503 before the request body is read.
+    """
+
+    def __init__(self, name: str, limit: int, queue_limit: int, queue_timeout_ms: int = 5000):
+        self.name = name
+        self.limit = limit
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout_ms / 1000
+        self._semaphore = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.max_waiting = 0
+
+    async def acquire(self) -> bool:
+        """Take a slot, queueing if needed; False when the request must be shed"""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            return self._admitted()
+        if self.waiting >= self.queue_limit:
+            self.rejected += 1
+            pool_rejected.inc(self.name, "queue_full")
+            return False
+
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        self._publish()
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._semaphore.acquire()
+        except TimeoutError:
+            self.timed_out += 1
+            pool_rejected.inc(self.name, "queue_timeout")
+            return False
+        finally:
+            self.waiting -= 1
+            self._publish()
+        return self._admitted()
+
+    def _admitted(self) -> bool:
+        self.active += 1
+        self.admitted += 1
+        self._publish()
+        return True
+
+    def release(self):
+        self.active -= 1
+        self._semaphore.release()
+        self._publish()
+
+    def _publish(self):
+        pool_active.set(self.name, value=self.active)
+        pool_waiting.set(self.name, value=self.waiting)
+        pool_saturation.set(self.name, value=round((self.active + self.waiting) / (self.limit + self.queue_limit), 4))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "queue_limit": self.queue_limit,
+            "queue_timeout_ms": int(self.queue_timeout * 1000),
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+def _pool(name: str, limit: int, queue_limit: int) -> ConcurrencyPool:
+    """Pool sized from CONCURRENCY_<NAME>_LIMIT / CONCURRENCY_<NAME>_QUEUE (.env)"""
+    prefix = f"CONCURRENCY_{name.upper()}"
+    return ConcurrencyPool(
+        name,
+        limit=int(os.environ.get(f"{prefix}_LIMIT", str(limit))),
+        queue_limit=int(os.environ.get(f"{prefix}_QUEUE", str(queue_limit))),
+        queue_timeout_ms=int(os.environ.get("CONCURRENCY_QUEUE_TIMEOUT_MS", "5000")),
+    )
+
+
+pools: Dict[str, ConcurrencyPool] = {
+    "public_read": _pool("public_read", 64, 256),
+    "public_write": _pool("public_write", 16, 64),
+    "admin": _pool("admin", 16, 32),
+    "analytics": _pool("analytics", 2, 8),
+    "auth": _pool("auth", 4, 16),
+}
+
+# First matching (path prefix, methods) wins; methods None matches any method,
+# pool None bypasses the pools (health probes must answer under load)
+ROUTE_CLASSES: Tuple[Tuple[str, Optional[Tuple[str, ...]], Optional[str]], ...] = (
+    ("/api/health/", None, None),
+    ("/api/auth/", None, "auth"),
+    ("/api/analytics/", None, "analytics"),
+    ("/api/admin/", None, "admin"),
+    ("/api/system/", None, "admin"),
+    ("/api/", ("GET", "HEAD"), "public_read"),
+    ("/api/", None, "public_write"),
+)
+
+RETRY_AFTER_SECONDS = os.environ.get("CONCURRENCY_RETRY_AFTER_SECONDS", "1")
+
+
+def route_class(method: str, path: str) -> Optional[str]:
+    """Pool serving ``method path``; None for health probes and routes outside /api (metrics, docs)"""
+    for prefix, methods, name in ROUTE_CLASSES:
+        if path.startswith(prefix) and (methods is None or method in methods):
+            return name
+    return None
+
+
+def concurrency_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: pool.stats() for name, pool in pools.items()}
+
+
+class ConcurrencyLimitMiddleware:
+    """Admits each /api request through its route class pool, shedding overload with 503 + Retry-After"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        name = route_class(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        pool = pools[name]
+        if not await pool.acquire():
+            response = ORJSONResponse(
+                {"detail": "Server busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": RETRY_AFTER_SECONDS},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release()
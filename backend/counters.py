@@ -0,0 +1,157 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from typing import Dict, Any, List
+from datetime import datetime, timedelta
+import asyncio
+
+# Single document holding the analytics counters, kept up to date with $inc
+METRICS_ID = "analytics"
+
+COMPLETED_PROJECT_STATUS = "Terminé"
+
+ACTIVITY_WINDOW_DAYS = 30
+
+
+def _day_key(moment: datetime) -> str:
+    return moment.strftime("%Y-%m-%d")
+
+
+async def increment_counters(db: AsyncIOMotorDatabase, activity: int = 0, **deltas: int):
+    """Atomically apply counter deltas; ``activity`` also counts that many client interactions for today.
+
+    Nothing is written until the document has been built by ``rebuild_counters``,
+    so increments never start from a partial baseline.
+    """
+    inc = {name: delta for name, delta in deltas.items() if delta}
+    if activity:
+        inc[f"daily_activity.{_day_key(datetime.utcnow())}"] = int(activity)
+    if not inc:
+        return
+    await db.metrics.update_one({"_id": METRICS_ID}, {"$inc": inc})
+
+
+def _totals(**fields: Any) -> Dict[str, Any]:
+    """$group stage computing the given accumulators over the whole collection"""
+    return {"$group": {"_id": None, **fields}}
+
+
+def _count_if(expression: Dict[str, Any]) -> Dict[str, Any]:
+    return {"$sum": {"$cond": [expression, 1, 0]}}
+
+
+def _activity_by_day(date_field: str, since: datetime) -> List[Dict[str, Any]]:
+    """Pipeline counting documents per day since ``since``"""
+    return [
+        {"$match": {date_field: {"$gte": since}}},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": f"${date_field}"}},
+            "count": {"$sum": 1},
+        }},
+    ]
+
+
+async def _aggregate_one(db: AsyncIOMotorDatabase, collection: str, pipeline: List[Dict[str, Any]]) -> Dict[str, Any]:
+    results = await db[collection].aggregate(pipeline).to_list(1)
+    return results[0] if results else {}
+
+
+async def rebuild_counters(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Recompute every counter from the source collections and replace the document.
+
+    Each collection is scanned by a single server-side pipeline, and the
+    pipelines run concurrently.
+    """
+    since = datetime.utcnow() - timedelta(days=ACTIVITY_WINDOW_DAYS)
+
+    (projects, blog_posts, technologies, testimonials, pending, resources,
+     skills, services, bookings, quotes, newsletter) = await asyncio.gather(
+        _aggregate_one(db, "projects", [_totals(
+            total={"$sum": 1},
+            completed=_count_if({"$eq": ["$status", COMPLETED_PROJECT_STATUS]}),
+        )]),
+        _aggregate_one(db, "blog_posts", [_totals(
+            published=_count_if({"$eq": ["$published", True]}),
+        )]),
+        _aggregate_one(db, "technologies", [_totals(
+            total={"$sum": 1},
+            expert=_count_if({"$eq": ["$level", "expert"]}),
+        )]),
+        _aggregate_one(db, "testimonials", [_totals(
+            total={"$sum": 1},
+            rating_sum={"$sum": {"$ifNull": ["$rating", 0]}},
+        )]),
+        _aggregate_one(db, "pending_testimonials", [{"$facet": {
+            "totals": [_totals(pending=_count_if({"$eq": ["$status", "pending"]}))],
+            "activity": _activity_by_day("submitted_at", since),
+        }}]),
+        _aggregate_one(db, "resources", [_totals(
+            downloads={"$sum": {"$ifNull": ["$downloads", 0]}},
+        )]),
+        _aggregate_one(db, "skill_categories", [_totals(
+            items={"$sum": {"$size": {"$ifNull": ["$items", []]}}},
+        )]),
+        _aggregate_one(db, "services", [_totals(total={"$sum": 1})]),
+        _aggregate_one(db, "bookings", [{"$facet": {
+            "totals": [_totals(
+                total={"$sum": 1},
+                confirmed=_count_if({"$eq": ["$status", "confirmed"]}),
+            )],
+            "activity": _activity_by_day("created_at", since),
+        }}]),
+        _aggregate_one(db, "quotes", [{"$facet": {
+            "totals": [_totals(total={"$sum": 1})],
+            "activity": _activity_by_day("created_at", since),
+        }}]),
+        _aggregate_one(db, "newsletter_subscriptions", [_totals(
+            active=_count_if({"$eq": ["$status", "active"]}),
+        )]),
+    )
+
+    def facet_totals(result: Dict[str, Any]) -> Dict[str, Any]:
+        totals = result.get("totals", [])
+        return totals[0] if totals else {}
+
+    pending_totals = facet_totals(pending)
+    bookings_totals = facet_totals(bookings)
+    quotes_totals = facet_totals(quotes)
+
+    # Client interactions per day over the activity window
+    daily_activity: Dict[str, int] = {}
+    for result in (pending, bookings, quotes):
+        for day in result.get("activity", []):
+            daily_activity[day["_id"]] = daily_activity.get(day["_id"], 0) + day["count"]
+
+    counters: Dict[str, Any] = {
+        "projects_total": projects.get("total", 0),
+        "projects_completed": projects.get("completed", 0),
+        "blog_posts_published": blog_posts.get("published", 0),
+        "technologies_total": technologies.get("total", 0),
+        "technologies_expert": technologies.get("expert", 0),
+        "testimonials_total": testimonials.get("total", 0),
+        "testimonials_rating_sum": testimonials.get("rating_sum", 0),
+        "pending_testimonials": pending_totals.get("pending", 0),
+        "downloads_total": resources.get("downloads", 0),
+        "skills_total": skills.get("items", 0),
+        "services_total": services.get("total", 0),
+        "bookings_total": bookings_totals.get("total", 0),
+        "bookings_confirmed": bookings_totals.get("confirmed", 0),
+        "quotes_total": quotes_totals.get("total", 0),
+        "newsletter_active": newsletter.get("active", 0),
+        "daily_activity": daily_activity,
+        "rebuilt_at": datetime.utcnow(),
+    }
+    await db.metrics.replace_one({"_id": METRICS_ID}, counters, upsert=True)
+    return counters
+
+
+async def read_counters(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Read the counters document in one fetch, building it on first use"""
+    counters = await db.metrics.find_one({"_id": METRICS_ID})
+    if counters is None:
+        counters = await rebuild_counters(db)
+    return counters
+
+
+def recent_activity(counters: Dict[str, Any]) -> int:
+    """Client interactions over the last ACTIVITY_WINDOW_DAYS days"""
+    cutoff = _day_key(datetime.utcnow() - timedelta(days=ACTIVITY_WINDOW_DAYS))
+    return sum(count for day, count in counters.get("daily_activity", {}).items() if day >= cutoff)
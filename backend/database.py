@@ -0,0 +1,148 @@
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession, AsyncIOMotorDatabase
+from pymongo import monitoring
+from typing import Any, Awaitable, Callable, Dict, Optional
+import threading
+import os
+
+from metrics import command_metrics
+from tracing import query_trace_listener
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """Collects connection pool events so connection churn can be observed"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def _incr(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._incr("pool_clears")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._incr("connections_created")
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._incr("connections_closed")
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self._incr("checkout_failures")
+
+    def connection_checked_out(self, event):
+        self._incr("checkouts")
+
+    def connection_checked_in(self, event):
+        self._incr("checkins")
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "connections_created": self.connections_created,
+                "connections_closed": self.connections_closed,
+                "connections_open": self.connections_created - self.connections_closed,
+                "connections_in_use": self.checkouts - self.checkins,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pool_clears": self.pool_clears,
+            }
+
+
+class MongoConnection:
+    """Holds the single Motor client owned by the application lifespan"""
+
+    def __init__(self):
+        self.client: Optional[AsyncIOMotorClient] = None
+        self.db: Optional[AsyncIOMotorDatabase] = None
+        self.pool_stats = PoolStatsListener()
+        self.settings: Dict[str, Any] = {}
+
+
+mongo = MongoConnection()
+
+
+def get_pool_settings() -> Dict[str, Any]:
+    """Read pool sizing from the environment (.env)"""
+    return {
+        "maxPoolSize": int(os.environ.get("MONGO_MAX_POOL_SIZE", "50")),
+        "minPoolSize": int(os.environ.get("MONGO_MIN_POOL_SIZE", "5")),
+        "maxIdleTimeMS": int(os.environ.get("MONGO_MAX_IDLE_TIME_MS", "300000")),
+    }
+
+
+def connect_to_mongo() -> AsyncIOMotorDatabase:
+    """Create the shared client. minPoolSize connections are opened in the background."""
+    if mongo.db is not None:
+        return mongo.db
+
+    mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+    mongo.settings = get_pool_settings()
+    mongo.client = AsyncIOMotorClient(
+        mongo_url,
+        event_listeners=[mongo.pool_stats, command_metrics, query_trace_listener],
+        **mongo.settings
+    )
+    mongo.db = mongo.client[os.environ.get('DB_NAME', 'test_database')]
+    return mongo.db
+
+
+def close_mongo_connection():
+    """Close the shared client on shutdown"""
+    if mongo.client is not None:
+        mongo.client.close()
+    mongo.client = None
+    mongo.db = None
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    """FastAPI dependency returning the shared database handle"""
+    if mongo.db is None:
+        raise RuntimeError("MongoDB client is not initialized")
+    return mongo.db
+
+
+# Topologies on which multi-document transactions are available
+TRANSACTION_TOPOLOGIES = ("ReplicaSetWithPrimary", "Sharded", "LoadBalanced")
+
+
+async def run_in_transaction(callback: Callable[[Optional[AsyncIOMotorClientSession]], Awaitable[Any]]) -> Any:
+    """Run ``callback(session)`` in a transaction (retried on transient errors).
+
+    A standalone server has no transactions, so there the callback runs once
+    with ``session=None`` and relies on its own conditional writes.
+    """
+    if mongo.client.topology_description.topology_type_name not in TRANSACTION_TOPOLOGIES:
+        return await callback(None)
+    async with await mongo.client.start_session() as session:
+        return await session.with_transaction(callback)
+
+
+def get_pool_stats() -> Dict[str, Any]:
+    """Pool configuration and connection counters"""
+    return {
+        "settings": mongo.settings,
+        "connected": mongo.client is not None,
+        **mongo.pool_stats.snapshot()
+    }
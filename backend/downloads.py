@@ -0,0 +1,208 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, PyMongoError
+from collections import Counter
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import time
+import os
+
+from buckets import DOWNLOAD_BUCKETS, download_bucket_update, group_downloads
+from cache import content_cache
+from counters import increment_counters
+
+logger = logging.getLogger(__name__)
+
+# Per-bucket write errors worth retrying: a concurrent upsert of the same bucket, a write conflict.
+# Anything else (document too large, validation) fails again on every retry, so those events are dropped.
+RETRYABLE_WRITE_ERRORS = {11000, 112}
+
+
+class DownloadBuffer:
+    """Write-behind buffer for resource download events.
+
+    Downloads are queued in memory and flushed every ``flush_interval_ms`` or
+    as soon as ``flush_events`` are waiting. A flush is one ``bulk_write`` of
+    hourly bucket upserts plus one ``bulk_write`` of per-resource ``$inc``s, so
+    a popular resource no longer turns every click into a hot-document write.
+    When ``queue_limit`` events are waiting, callers flush inline (backpressure).
+    """
+
+    def __init__(self, flush_interval_ms: int = 1000, flush_events: int = 200, queue_limit: int = 10000):
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_events = flush_events
+        self.queue_limit = queue_limit
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._events: List[Dict[str, Any]] = []
+        self._enqueued_at: List[float] = []
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.events_flushed = 0
+        self.events_dropped = 0
+        self.total_flush_seconds = 0.0
+        self.last_flush_lag_ms = 0.0
+        self.max_flush_lag_ms = 0.0
+
+    def start(self, db: AsyncIOMotorDatabase):
+        self._db = db
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write out whatever is still queued.
+
+        The flusher is asked to exit rather than cancelled, so a flush in
+        progress finishes its count updates instead of losing its batch.
+        """
+        if self._task is not None:
+            self._stopping.set()
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._db is not None:
+            await self.flush()
+
+    async def record(self, event: Dict[str, Any]):
+        """Queue one download record (a ``ResourceDownload`` dict)"""
+        self._events.append(event)
+        self._enqueued_at.append(time.monotonic())
+        writer_alive = self._task is not None and not self._task.done()
+        if len(self._events) >= self.queue_limit or not writer_alive:
+            # Backpressure, or no writer to hand the events to: flush inline
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Inline download flush failed")
+            self._trim()
+        elif len(self._events) >= self.flush_events:
+            self._wakeup.set()
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                if self._stopping.is_set():
+                    # stop() drains the queue itself
+                    return
+                await self.flush()
+            except Exception:
+                # Keep flushing; flush() has put back whatever it could not write
+                logger.exception("Download flush failed")
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._events:
+                return
+            events, self._events = self._events, []
+            enqueued_at, self._enqueued_at = self._enqueued_at, []
+
+            started = time.monotonic()
+            groups = group_downloads(events)
+            try:
+                await self._db[DOWNLOAD_BUCKETS].bulk_write(
+                    [download_bucket_update(bucket_id, group) for bucket_id, group in groups],
+                    ordered=False
+                )
+                failed_groups = set()
+                dropped_groups = set()
+            except BulkWriteError as e:
+                # Unordered: only the groups listed in writeErrors were not written
+                failed_groups, dropped_groups = set(), set()
+                for error in e.details.get("writeErrors", []):
+                    bucket_id, group = groups[error["index"]]
+                    if error.get("code") in RETRYABLE_WRITE_ERRORS:
+                        failed_groups.add(error["index"])
+                    else:
+                        dropped_groups.add(error["index"])
+                        logger.error(f"Dropping {len(group)} downloads rejected for bucket "
+                                     f"{bucket_id}: {error.get('errmsg')}")
+                logger.error(f"Download flush failed for {len(failed_groups) + len(dropped_groups)} buckets: {e}")
+            except PyMongoError as e:
+                failed_groups, dropped_groups = set(range(len(groups))), set()
+                logger.error(f"Download flush failed: {e}")
+            except Exception:
+                # Not a database error, so retrying the same events would fail the same way
+                failed_groups, dropped_groups = set(), set(range(len(groups)))
+                logger.exception(f"Download flush failed, dropping {len(events)} events")
+
+            if failed_groups or dropped_groups:
+                self.failed_flushes += 1
+                self.events_dropped += sum(len(groups[index][1]) for index in dropped_groups)
+                failed = {id(event) for index in failed_groups for event in groups[index][1]}
+                retry = [index for index, event in enumerate(events) if id(event) in failed]
+                self._requeue([events[index] for index in retry], [enqueued_at[index] for index in retry])
+                events = [event for index, (_, group) in enumerate(groups)
+                          if index not in failed_groups and index not in dropped_groups
+                          for event in group]
+                if not events:
+                    return
+
+            downloads = Counter(event["resource_id"] for event in events)
+            try:
+                await self._db.resources.bulk_write(
+                    [UpdateOne({"id": resource_id}, {"$inc": {"downloads": count}})
+                     for resource_id, count in downloads.items()],
+                    ordered=False
+                )
+                await increment_counters(self._db, downloads_total=len(events))
+            except Exception as e:
+                # The events are stored in their buckets; only the denormalized counts lag
+                logger.error(f"Download count update failed for {len(events)} events: {e}")
+
+            finished = time.monotonic()
+            content_cache.bump_version("resources")
+            self.flushes += 1
+            self.events_flushed += len(events)
+            self.total_flush_seconds += finished - started
+            self.last_flush_lag_ms = round((finished - enqueued_at[0]) * 1000, 2)
+            self.max_flush_lag_ms = max(self.max_flush_lag_ms, self.last_flush_lag_ms)
+
+    def _requeue(self, events: List[Dict[str, Any]], enqueued_at: List[float]):
+        """Put unwritten events back at the head of the queue, dropping the oldest past queue_limit"""
+        self._events[:0] = events
+        self._enqueued_at[:0] = enqueued_at
+        self._trim()
+
+    def _trim(self):
+        """Drop the oldest events past queue_limit, so a failing database cannot grow the queue without bound"""
+        overflow = len(self._events) - self.queue_limit
+        if overflow > 0:
+            logger.error(f"Download queue full, dropping {overflow} oldest events")
+            self.events_dropped += overflow
+            del self._events[:overflow]
+            del self._enqueued_at[:overflow]
+
+    def stats(self) -> Dict[str, Any]:
+        flushes = self.flushes or 1
+        oldest = self._enqueued_at[0] if self._enqueued_at else None
+        return {
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "flush_events": self.flush_events,
+            "queue_limit": self.queue_limit,
+            "queue_depth": len(self._events),
+            "oldest_event_age_ms": round((time.monotonic() - oldest) * 1000, 2) if oldest else 0.0,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "events_flushed": self.events_flushed,
+            "events_dropped": self.events_dropped,
+            "avg_batch_size": round(self.events_flushed / flushes, 2),
+            "avg_flush_ms": round(self.total_flush_seconds / flushes * 1000, 2),
+            "last_flush_lag_ms": self.last_flush_lag_ms,
+            "max_flush_lag_ms": self.max_flush_lag_ms,
+        }
+
+
+download_buffer = DownloadBuffer(
+    flush_interval_ms=int(os.environ.get("DOWNLOAD_FLUSH_INTERVAL_MS", "1000")),
+    flush_events=int(os.environ.get("DOWNLOAD_FLUSH_EVENTS", "200")),
+    queue_limit=int(os.environ.get("DOWNLOAD_QUEUE_LIMIT", "10000")),
+)
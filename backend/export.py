@@ -0,0 +1,123 @@
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional, Tuple, Type
+from datetime import datetime
+import csv
+import io
+import json
+import os
+
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "500"))
+
+ExportFormat = Literal["ndjson", "csv"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def model_columns(model: Type[BaseModel], prefix: str = "") -> List[str]:
+    """Flat CSV columns for a model, nested models expanded as dotted names"""
+    columns = []
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        # Optional[Model] -> Model
+        for arg in getattr(annotation, "__args__", ()):
+            if isinstance(arg, type) and issubclass(arg, BaseModel):
+                annotation = arg
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            columns.extend(model_columns(annotation, f"{prefix}{name}."))
+        else:
+            columns.append(f"{prefix}{name}")
+    return columns
+
+
+def _cell(document: Dict[str, Any], column: str) -> Any:
+    value: Any = document
+    for part in column.split("."):
+        if not isinstance(value, dict):
+            return ""
+        value = value.get(part)
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, default=_json_default, ensure_ascii=False)
+    return value
+
+
+async def _batches(cursor) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Read the cursor EXPORT_BATCH_SIZE documents at a time"""
+    try:
+        batch = []
+        async for document in cursor:
+            batch.append(document)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        await cursor.close()
+
+
+async def _ndjson_rows(batches: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[str]:
+    async for batch in batches:
+        yield "".join(
+            json.dumps(document, default=_json_default, ensure_ascii=False) + "\n"
+            for document in batch
+        )
+
+
+async def _csv_rows(batches: AsyncIterator[List[Dict[str, Any]]], columns: List[str]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_cell(document, column) for column in columns] for document in batch)
+        yield buffer.getvalue()
+
+
+def stream_export(
+    collection: AsyncIOMotorCollection,
+    format: ExportFormat,
+    model: Type[BaseModel],
+    filter: Optional[Dict[str, Any]] = None,
+    sort: Optional[List[Tuple[str, int]]] = None,
+    filename: Optional[str] = None,
+    pipeline: Optional[List[Dict[str, Any]]] = None
+) -> StreamingResponse:
+    """Stream a whole collection as NDJSON or CSV straight from the cursor.
+
+    ``pipeline`` replaces the find/sort with an aggregation (e.g. unwinding buckets).
+    Only one batch is held in memory at a time, whatever the collection size.
+    """
+    if pipeline is not None:
+        cursor = collection.aggregate(pipeline, batchSize=EXPORT_BATCH_SIZE)
+    else:
+        cursor = collection.find(filter or {}, {"_id": 0}).sort(sort or [("id", 1)]).batch_size(EXPORT_BATCH_SIZE)
+    batches = _batches(cursor)
+    if format == "csv":
+        body = _csv_rows(batches, model_columns(model))
+    else:
+        body = _ndjson_rows(batches)
+
+    filename = filename or collection.name
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
@@ -0,0 +1,197 @@
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import PyMongoError
+from typing import List, Dict, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Every collection is looked up by its custom "id" field
+ID_INDEX = {"keys": [("id", ASCENDING)], "unique": True}
+
+
+def keyset(*fields) -> Dict[str, Any]:
+    """Index backing keyset pagination: the filter/sort fields followed by the id tie-breaker"""
+    direction = fields[-1][1]
+    return {"keys": [*fields, ("id", direction)]}
+
+# Declarative index registry: collection -> indexes backing its query shapes
+INDEX_REGISTRY: Dict[str, List[Dict[str, Any]]] = {
+    "personal_info": [ID_INDEX],
+    "skill_categories": [
+        ID_INDEX,
+        {"keys": [("category_key", ASCENDING)]},
+    ],
+    "technologies": [
+        ID_INDEX,
+        {"keys": [("name", ASCENDING)]},
+        {"keys": [("level", ASCENDING)]},
+    ],
+    "projects": [
+        ID_INDEX,
+        keyset(("order_index", ASCENDING)),
+        keyset(("created_at", ASCENDING)),
+        keyset(("status", ASCENDING), ("order_index", ASCENDING)),
+        keyset(("category", ASCENDING), ("order_index", ASCENDING)),
+    ],
+    "services": [
+        ID_INDEX,
+        {"keys": [("order_index", ASCENDING)]},
+    ],
+    "testimonials": [
+        ID_INDEX,
+        keyset(("order_index", ASCENDING)),
+        keyset(("created_at", ASCENDING)),
+        keyset(("featured", ASCENDING), ("order_index", ASCENDING)),
+    ],
+    "pending_testimonials": [
+        ID_INDEX,
+        {"keys": [("status", ASCENDING), ("submitted_at", DESCENDING)]},
+        {"keys": [("submitted_at", DESCENDING)]},
+    ],
+    "statistics": [
+        ID_INDEX,
+        {"keys": [("order_index", ASCENDING)]},
+    ],
+    "social_links": [
+        ID_INDEX,
+        {"keys": [("order_index", ASCENDING)]},
+    ],
+    "process_steps": [
+        ID_INDEX,
+        {"keys": [("step", ASCENDING)]},
+    ],
+    "resources": [
+        ID_INDEX,
+        keyset(("created_at", DESCENDING)),
+        keyset(("downloads", DESCENDING)),
+        keyset(("category", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    # Buckets per resource per hour, a new one every BUCKET_MAX_EVENTS events
+    "resource_download_buckets": [
+        ID_INDEX,
+        keyset(("hour", DESCENDING)),
+        keyset(("resource_id", ASCENDING), ("hour", DESCENDING)),
+    ],
+    "blog_posts": [
+        ID_INDEX,
+        keyset(("published", ASCENDING), ("created_at", DESCENDING)),
+        keyset(("created_at", DESCENDING)),
+        keyset(("published_at", DESCENDING)),
+        keyset(("category", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "admin_users": [
+        ID_INDEX,
+        {"keys": [("username", ASCENDING)], "unique": True},
+        {"keys": [("email", ASCENDING)], "unique": True},
+    ],
+    "quotes": [
+        ID_INDEX,
+        keyset(("created_at", DESCENDING)),
+        keyset(("status", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "bookings": [
+        ID_INDEX,
+        # One reservation per slot; cancelled bookings set reserved to false and free it
+        {"keys": [("slot_date", ASCENDING), ("booking_data.time", ASCENDING)],
+         "unique": True, "partialFilterExpression": {"reserved": True}},
+        keyset(("created_at", DESCENDING)),
+        keyset(("status", ASCENDING), ("created_at", DESCENDING)),
+    ],
+    "contact_messages": [
+        ID_INDEX,
+        keyset(("submitted_at", DESCENDING)),
+        keyset(("status", ASCENDING), ("submitted_at", DESCENDING)),
+    ],
+    "newsletter_subscriptions": [
+        ID_INDEX,
+        {"keys": [("email", ASCENDING)], "unique": True},
+        {"keys": [("status", ASCENDING)]},
+    ],
+    # Buckets per hour, a new one every BUCKET_MAX_EVENTS events
+    "status_check_buckets": [
+        ID_INDEX,
+        {"keys": [("hour", DESCENDING)]},
+    ],
+}
+
+# Options compared between the registry and the server
+COMPARED_OPTIONS = ("unique", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _key_of(keys) -> tuple:
+    return tuple((field, int(direction) if isinstance(direction, (int, float)) else direction)
+                 for field, direction in keys)
+
+
+def _options_of(spec: Dict[str, Any]) -> Dict[str, Any]:
+    options = {name: spec[name] for name in COMPARED_OPTIONS if spec.get(name) is not None}
+    if not options.get("unique"):
+        options.pop("unique", None)
+    return options
+
+
+async def verify_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Compare the indexes on the server with the registry"""
+    report = {"ok": True, "missing": [], "different": [], "extra": []}
+
+    for collection_name, specs in INDEX_REGISTRY.items():
+        existing = await db[collection_name].index_information()
+        existing_by_key = {
+            _key_of(info["key"]): (name, info)
+            for name, info in existing.items()
+            if name != "_id_"
+        }
+
+        expected_keys = set()
+        for spec in specs:
+            key = _key_of(spec["keys"])
+            expected_keys.add(key)
+            if key not in existing_by_key:
+                report["missing"].append({"collection": collection_name, "keys": spec["keys"], **_options_of(spec)})
+                continue
+
+            name, info = existing_by_key[key]
+            if _options_of(info) != _options_of(spec):
+                report["different"].append({
+                    "collection": collection_name,
+                    "name": name,
+                    "expected": _options_of(spec),
+                    "actual": _options_of(info),
+                })
+
+        for key, (name, _) in existing_by_key.items():
+            if key not in expected_keys:
+                report["extra"].append({"collection": collection_name, "name": name})
+
+    report["ok"] = not report["missing"] and not report["different"]
+    return report
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> Dict[str, Any]:
+    """Create every missing registry index, then return the verification report.
+
+    Indexes whose options differ from the registry are reported, never dropped.
+    """
+    report = await verify_indexes(db)
+    failed = []
+
+    for missing in report["missing"]:
+        spec = dict(missing)
+        collection_name = spec.pop("collection")
+        keys = spec.pop("keys")
+        try:
+            await db[collection_name].create_indexes([IndexModel(keys, **spec)])
+        except PyMongoError as e:
+            failed.append({"collection": collection_name, "keys": keys, "error": str(e)})
+
+    if report["missing"]:
+        report = await verify_indexes(db)
+    report["failed"] = failed
+
+    for item in report["missing"] + failed:
+        logger.warning(f"Index missing on {item['collection']}: {item['keys']}")
+    for item in report["different"]:
+        logger.warning(f"Index {item['name']} on {item['collection']} differs from registry: "
+                       f"expected {item['expected']}, found {item['actual']}")
+    return report
@@ -0,0 +1,264 @@
+from pymongo import monitoring
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import threading
+import time
+
+# Prometheus text exposition format, served by GET /metrics
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """A named family of samples, one per combination of label values.
+
+    Samples are updated from the event loop and from pymongo's monitoring
+    threads, hence the lock.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self._lock = threading.Lock()
+        self._values: Dict[LabelValues, Any] = {}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            samples = sorted(self._values.items())
+        lines.extend(self._lines(labels, value) for labels, value in samples)
+        return lines
+
+    def _lines(self, labels: LabelValues, value: Any) -> str:
+        return f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class CounterMetric(Metric):
+    kind = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class GaugeMetric(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels: str, value: float):
+        with self._lock:
+            self._values[labels] = value
+
+
+class HistogramMetric(Metric):
+    """Fixed-bucket histogram; each sample is [per-bucket counts..., +Inf count, sum]"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = HTTP_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels: str, value: float):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            sample = self._values.get(labels)
+            if sample is None:
+                sample = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            sample[index] += 1
+            sample[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            samples = sorted((labels, list(sample)) for labels, sample in self._values.items())
+        for labels, sample in samples:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), sample[:-1]):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(sample[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrics rendered by /metrics, plus gauges read from existing ``stats()`` methods"""
+
+    def __init__(self):
+        self._metrics: List[Metric] = []
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> CounterMetric:
+        return self._register(CounterMetric(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> GaugeMetric:
+        return self._register(GaugeMetric(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = HTTP_BUCKETS) -> HistogramMetric:
+        return self._register(HistogramMetric(name, help, labels, buckets))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, prefix: str, stats: Callable[[], Dict[str, Any]]):
+        """Expose every numeric top-level value of ``stats()`` as ``<prefix>_<key>`` gauges"""
+        self._collectors[prefix] = stats
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for prefix, stats in self._collectors.items():
+            for key, value in stats().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f"# TYPE {prefix}_{key} gauge")
+                    lines.append(f"{prefix}_{key} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status",
+    ("method", "route", "status")
+)
+http_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and status",
+    ("method", "route", "status"), HTTP_BUCKETS
+)
+mongo_duration = registry.histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time by collection and operation",
+    ("collection", "command"), MONGO_BUCKETS
+)
+mongo_failures = registry.counter(
+    "mongodb_command_failures_total", "MongoDB commands that returned an error",
+    ("collection", "command")
+)
+
+
+# Route templates by endpoint, so /api/quotes/{quote_id} is one series rather than one per id
+_route_templates: Dict[Callable, str] = {}
+
+
+def route_template(scope: Scope) -> str:
+    """Path template of the route that served ``scope`` (set once routing has run)"""
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    template = _route_templates.get(endpoint)
+    if template is None:
+        template = next(
+            (route.path for route in scope["app"].routes if getattr(route, "endpoint", None) is endpoint),
+            "unmatched"
+        )
+        _route_templates[endpoint] = template
+    return template
+
+
+class MetricsMiddleware:
+    """Records request count, in-flight requests and latency for every HTTP request"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            labels = (scope["method"], route_template(scope), str(status))
+            http_requests.inc(*labels)
+            http_duration.observe(*labels, value=elapsed)
+
+
+def command_collection(command_name: str, command: Dict[str, Any]) -> str:
+    """Collection a command targets ("" for database-level commands like ping)"""
+    target = command.get("collection") if command_name == "getMore" else command.get(command_name)
+    return target if isinstance(target, str) else ""
+
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Times every Motor command per collection and operation.
+
+    Only the started event carries the command document, so the collection is
+    remembered by request id until the command completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections: Dict[Tuple[Any, int], str] = {}
+
+    def started(self, event):
+        collection = command_collection(event.command_name, event.command)
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _finish(self, event) -> Optional[str]:
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), None)
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        mongo_duration.observe(collection or "", event.command_name, value=event.duration_micros / 1_000_000)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_duration.observe(collection or "", event.command_name, value=event.duration_micros / 1_000_000)
+        mongo_failures.inc(collection or "", event.command_name)
+
+
+command_metrics = CommandMetricsListener()
@@ -331,6 +331,7 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    exp: Optional[int] = None
 
 
 # Resource Model (for downloads/guides)
@@ -448,4 +449,43 @@ class PendingTestimonial(BaseModel):
     service_used: Optional[str] = None
     status: str = "pending"  # pending, approved, rejected
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
-    reviewed_at: Optional[datetime] = None
\ No newline at end of file
+    reviewed_at: Optional[datetime] = None
+
+# Newsletter Models
+class NewsletterSubscription(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    email: EmailStr
+    status: str = "active"  # active, unsubscribed
+    subscribed_at: datetime = Field(default_factory=datetime.utcnow)
+
+class NewsletterImportReport(BaseModel):
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    failed: int = 0
+    invalid_samples: List[str] = []
+
+
+# Bulk Admin Models
+class BulkUpdateItem(BaseModel):
+    id: str
+    changes: Dict[str, Any]
+
+class BulkRequest(BaseModel):
+    create: List[Dict[str, Any]] = []
+    update: List[BulkUpdateItem] = []
+    delete: List[str] = []
+    reorder: Dict[str, int] = {}  # id -> position in the order field (order_index; step for process steps)
+
+class BulkItemResult(BaseModel):
+    op: str  # create, update, delete, reorder
+    index: int
+    id: Optional[str] = None
+    status: str  # ok, not_found, invalid, error
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    inserted: int = 0
+    modified: int = 0
+    deleted: int = 0
+    results: List[BulkItemResult] = []
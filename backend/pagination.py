@@ -0,0 +1,124 @@
+from fastapi import HTTPException, Query, Response
+from motor.motor_asyncio import AsyncIOMotorCollection
+from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+import os
+
+PAGE_DEFAULT_LIMIT = int(os.environ.get("PAGE_DEFAULT_LIMIT", "100"))
+PAGE_MAX_LIMIT = int(os.environ.get("PAGE_MAX_LIMIT", "200"))
+
+
+class PageParams:
+    """Keyset pagination query parameters shared by the list endpoints.
+
+    ``sort`` names a whitelisted field, prefixed with ``-`` for descending order.
+    The next page is requested with the opaque ``cursor`` returned in the
+    ``X-Next-Cursor`` header; ``include_total`` adds ``X-Total-Count``.
+    """
+
+    def __init__(
+        self,
+        limit: int = Query(PAGE_DEFAULT_LIMIT, ge=1),
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+        include_total: bool = False
+    ):
+        self.limit = min(limit, PAGE_MAX_LIMIT)
+        self.cursor = cursor
+        self.sort = sort
+        self.include_total = include_total
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(field: str, direction: int, value: Any, last_id: str) -> str:
+    payload = json.dumps([field, direction, _encode_value(value), last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, field: str, direction: int) -> Tuple[Any, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_field, cursor_direction, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        value = _decode_value(value)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cursor_field != field or cursor_direction != direction:
+        raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+    return value, last_id
+
+
+def resolve_sort(sort: Optional[str], sort_fields: List[str], default_sort: str) -> Tuple[str, int]:
+    """Turn ``field`` / ``-field`` into (field, direction), rejecting fields outside the whitelist"""
+    requested = sort or default_sort
+    direction = -1 if requested.startswith("-") else 1
+    field = requested.lstrip("-")
+    if field not in sort_fields:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid sort field. Allowed: {', '.join(sort_fields)}"
+        )
+    return field, direction
+
+
+def _after(field: str, direction: int, value: Any, last_id: str) -> Dict[str, Any]:
+    """Keyset condition selecting documents strictly after (value, last_id).
+
+    MongoDB sorts null (and missing) values before everything else, so they
+    come first in ascending order and last in descending order.
+    """
+    op = "$gt" if direction == 1 else "$lt"
+    if value is None:
+        same_value = {field: None, "id": {op: last_id}}
+        if direction == 1:
+            return {"$or": [{field: {"$ne": None}}, same_value]}
+        return same_value
+
+    conditions = [{field: {op: value}}, {field: value, "id": {op: last_id}}]
+    if direction == -1:
+        conditions.append({field: None})
+    return {"$or": conditions}
+
+
+async def paginate(
+    collection: AsyncIOMotorCollection,
+    page: PageParams,
+    response: Response,
+    filter: Dict[str, Any],
+    sort_fields: List[str],
+    default_sort: str
+) -> List[Dict[str, Any]]:
+    """Fetch one page ordered by (sort field, id) and set the pagination headers"""
+    field, direction = resolve_sort(page.sort, sort_fields, default_sort)
+
+    query = filter
+    if page.cursor:
+        value, last_id = decode_cursor(page.cursor, field, direction)
+        after = _after(field, direction, value, last_id)
+        query = {"$and": [filter, after]} if filter else after
+
+    documents = await collection.find(query).sort(
+        [(field, direction), ("id", direction)]
+    ).to_list(page.limit + 1)
+
+    if len(documents) > page.limit:
+        documents = documents[:page.limit]
+        last = documents[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(field, direction, last.get(field), last["id"])
+
+    if page.include_total:
+        response.headers["X-Total-Count"] = str(await collection.count_documents(filter))
+
+    return documents
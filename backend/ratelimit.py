@@ -0,0 +1,177 @@
+from fastapi.responses import ORJSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import math
+import time
+import os
+
+from metrics import registry
+
+rate_limited = registry.counter(
+    "rate_limited_total", "Requests rejected with a 429 by the rate limiter", ("route",)
+)
+
+# "METHOD PATH LIMIT/WINDOW_SECONDS", comma separated: a burst of LIMIT requests
+# per client IP, refilled evenly over WINDOW_SECONDS
+DEFAULT_RATE_LIMIT_RULES = ",".join([
+    "POST /api/contact 5/600",
+    "POST /api/testimonials/submit 3/3600",
+    "POST /api/newsletter/subscribe 5/3600",
+    "POST /api/quotes 10/3600",
+    "POST /api/bookings 5/3600",
+    "POST /api/auth/login 10/300",
+])
+
+
+class RateLimitRule(NamedTuple):
+    method: str
+    path: str
+    limit: int
+    window: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens refilled per second"""
+        return self.limit / self.window
+
+
+def parse_rules(value: str) -> Dict[Tuple[str, str], RateLimitRule]:
+    rules = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        method, path, quota = entry.split()
+        limit, window = quota.split("/")
+        rules[(method.upper(), path)] = RateLimitRule(method.upper(), path, int(limit), float(window))
+    return rules
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class RateLimiter:
+    """Per client IP and route token buckets, kept in a bounded LRU.
+
+    A bucket evicted from the LRU starts full again the next time its client
+    shows up, so ``max_buckets`` only needs to cover the clients active
+    within one window.
+    """
+
+    def __init__(self, rules: Dict[Tuple[str, str], RateLimitRule], max_buckets: int = 10000, trusted_proxies: int = 0):
+        self.rules = rules
+        self.max_buckets = max_buckets
+        self.trusted_proxies = trusted_proxies
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.allowed = 0
+        self.limited = 0
+        self.evicted = 0
+
+    def client_ip(self, scope: Scope) -> str:
+        """Client address: the socket peer, or with ``trusted_proxies`` set, the
+        X-Forwarded-For entry appended by the outermost of our own proxies.
+
+        Without a proxy in front, clients write X-Forwarded-For themselves, so it
+        is only read when a proxy count is configured.
+        """
+        if self.trusted_proxies:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    hops = [hop.strip() for hop in value.decode("latin-1").split(",")]
+                    if len(hops) >= self.trusted_proxies:
+                        return hops[-self.trusted_proxies]
+                    break
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def take(self, rule: RateLimitRule, client: str) -> Tuple[bool, float]:
+        """Spend one token; returns whether the request is allowed and the tokens left"""
+        now = time.monotonic()
+        key = (client, rule.path)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rule.limit, now)
+            if len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+                self.evicted += 1
+        else:
+            self._buckets.move_to_end(key)
+            bucket.tokens = min(rule.limit, bucket.tokens + (now - bucket.updated) * rule.rate)
+            bucket.updated = now
+
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            self.allowed += 1
+            return True, bucket.tokens
+        self.limited += 1
+        return False, bucket.tokens
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rules": len(self.rules),
+            "buckets": len(self._buckets),
+            "max_buckets": self.max_buckets,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "evicted": self.evicted,
+        }
+
+    def describe(self) -> List[Dict[str, Any]]:
+        return [rule._asdict() for rule in self.rules.values()]
+
+
+rate_limiter = RateLimiter(
+    parse_rules(os.environ.get("RATE_LIMIT_RULES", DEFAULT_RATE_LIMIT_RULES)),
+    max_buckets=int(os.environ.get("RATE_LIMIT_MAX_BUCKETS", "10000")),
+    trusted_proxies=int(os.environ.get("RATE_LIMIT_TRUSTED_PROXIES", "0")),
+)
+
+
+def rate_limit_headers(rule: RateLimitRule, tokens: float) -> Dict[str, str]:
+    """RateLimit-* headers (IETF draft) for the bucket after this request"""
+    return {
+        "RateLimit-Limit": str(rule.limit),
+        "RateLimit-Remaining": str(math.floor(tokens)),
+        "RateLimit-Reset": str(math.ceil((rule.limit - tokens) / rule.rate)),
+        "RateLimit-Policy": f"{rule.limit};w={rule.window:g}",
+    }
+
+
+class RateLimitMiddleware:
+    """Answers over-quota requests with 429 before the body is read or any work is done"""
+
+    def __init__(self, app: ASGIApp, limiter: Optional[RateLimiter] = None):
+        self.app = app
+        self.limiter = limiter or rate_limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        rule = self.limiter.rules.get((scope["method"], scope["path"])) if scope["type"] == "http" else None
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        allowed, tokens = self.limiter.take(rule, self.limiter.client_ip(scope))
+        headers = rate_limit_headers(rule, tokens)
+        if not allowed:
+            rate_limited.inc(rule.path)
+            headers["Retry-After"] = str(math.ceil((1 - tokens) / rule.rate))
+            response = ORJSONResponse(
+                {"detail": "Too many requests, please retry later"},
+                status_code=429,
+                headers=headers,
+            )
+            await response(scope, receive, send)
+            return
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers.items():
+                    response_headers.append(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,48 @@
+from fastapi import Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from typing import Any, Dict, Iterable, Optional, Type, TypeVar, Union
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def trusted(model: Type[BaseModel], document: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of ``model`` from a document this application wrote, without validation.
+
+    ``model_construct`` fills defaults for fields older documents lack and drops
+    anything that is not a field (``_id``, internal flags). Nested models stay
+    plain dicts, which orjson serializes directly.
+    """
+    return model.model_construct(**document).__dict__
+
+
+def trusted_response(
+    model: Type[BaseModel],
+    documents: Union[Dict[str, Any], Iterable[Dict[str, Any]]],
+    response: Optional[Response] = None
+) -> ORJSONResponse:
+    """Serialize database documents straight to JSON, skipping response_model validation.
+
+    Returning a Response bypasses FastAPI's sub-response, so headers set on the
+    injected ``response`` (pagination cursors, totals) are carried over here.
+    """
+    if isinstance(documents, dict):
+        content: Any = trusted(model, documents)
+    else:
+        content = [trusted(model, document) for document in documents]
+
+    serialized = ORJSONResponse(content)
+    if response is not None:
+        for name, value in response.headers.items():
+            if name != "content-length":
+                serialized.headers.append(name, value)
+    return serialized
+
+
+def created(model: Type[ModelT], data: BaseModel) -> ModelT:
+    """Build ``model`` from already-validated create input in a single pass.
+
+    The input model validated every field on the way in; constructing the
+    stored model from it only adds defaults (id, timestamps, status).
+    """
+    return model.model_construct(**data.__dict__)
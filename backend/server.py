@@ -1,36 +1,122 @@
-from fastapi import FastAPI, APIRouter
+import time
+
+# Import-to-ready time is measured from here (see startup.Readiness)
+IMPORT_STARTED = time.monotonic()
+
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
-import os
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from contextlib import asynccontextmanager
+import asyncio
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
 import uuid
 from datetime import datetime
 
+ROOT_DIR = Path(__file__).parent
+# Settings are read by the modules below when they are imported, so .env is loaded first
+load_dotenv(ROOT_DIR / '.env')
+
 # Import admin routes, auth routes and analytics routes
-from admin_routes import admin_router
+from admin_routes import admin_router, dedupe_newsletter_subscriptions
 from auth_routes import auth_router
-from analytics_routes import analytics_router
+from analytics_routes import analytics_router, analytics_snapshot
+from auth import get_current_user, hashing_executor, optional_security
+from availability import (
+    CANCELLED_STATUS, availability_range, backfill_booking_slots, resolve_slot_conflicts, slot_fields
+)
+from buckets import (
+    DOWNLOAD_BUCKETS, STATUS_CHECK_BUCKETS, hour_range, hourly_rollup,
+    migrate_event_buckets, recent_events, record_status_check, unwind_pipeline
+)
+from cache import content_cache
+from concurrency import ConcurrencyLimitMiddleware, concurrency_stats
+from counters import increment_counters
+from database import connect_to_mongo, close_mongo_connection, get_database, get_pool_stats
+from downloads import download_buffer
+from export import ExportFormat, stream_export
+from indexes import ensure_indexes, verify_indexes
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, registry as metrics_registry
+from models import AdminUser, NewsletterSubscription
+from pagination import PageParams, paginate
+from ratelimit import RateLimitMiddleware, rate_limiter
+from serialization import created, trusted, trusted_response
+from startup import WarmupStep, readiness
+from submissions import submission_queue
+from tracing import QueryTraceMiddleware
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+logger = logging.getLogger(__name__)
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
 
-# Create the main app without a prefix
-app = FastAPI()
+async def bootstrap_indexes(db: AsyncIOMotorDatabase):
+    # Bookings need their slot fields, and existing double bookings and duplicate
+    # subscribers must be resolved, before the unique indexes can be built
+    await backfill_booking_slots(db)
+    await resolve_slot_conflicts(db)
+    await dedupe_newsletter_subscriptions(db)
+    report = await ensure_indexes(db)
+    # A missing index (e.g. the unique booking slot index) means lost guarantees, not just speed
+    if report["missing"]:
+        unbuilt = ", ".join(f"{item['collection']} {item['keys']}" for item in report["missing"])
+        raise RuntimeError(f"Indexes not built: {unbuilt}")
+
+
+async def preload_public_content(db: AsyncIOMotorDatabase):
+    """Fill content_cache with every public homepage section"""
+    await asyncio.gather(*(section(db) for section in PUBLIC_BUNDLE_SECTIONS.values()))
+
+
+def warmup_steps(db: AsyncIOMotorDatabase) -> List[WarmupStep]:
+    """Startup work, in order: each step needs the ones before it"""
+    return [
+        ("ping", lambda: db.command("ping")),
+        ("indexes", lambda: bootstrap_indexes(db)),
+        ("analytics_snapshot", lambda: analytics_snapshot.get(db)),
+        ("public_cache", lambda: preload_public_content(db)),
+    ]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # A single pooled MongoDB client is shared by every router
+    db = connect_to_mongo()
+    download_buffer.start(db)
+    submission_queue.start(db)
+    # Served traffic starts warm; /api/health/ready stays 503 until the warm-up succeeds
+    await readiness.start(warmup_steps(db), started_at=IMPORT_STARTED)
+    yield
+    await readiness.stop()
+    await submission_queue.stop()
+    await download_buffer.stop()
+    hashing_executor.shutdown()
+    close_mongo_connection()
+
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
 
+async def admin_export_format(
+    format: Optional[ExportFormat] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+) -> Optional[ExportFormat]:
+    """``?format=`` of a list endpoint; exports stream the whole collection, so they require authentication"""
+    if format is not None:
+        if credentials is None:
+            raise HTTPException(status_code=403, detail="Not authenticated")
+        await get_current_user(credentials, db)
+    return format
+
+
 # Define Models
 class StatusCheck(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -38,7 +124,7 @@ class StatusCheck(BaseModel):
     timestamp: datetime = Field(default_factory=datetime.utcnow)
 
 class StatusCheckCreate(BaseModel):
-    client_name: str
+    client_name: str = Field(..., max_length=200)
 
 # Quote Models
 class QuoteData(BaseModel):
@@ -95,6 +181,8 @@ class Booking(BaseModel):
     booking_data: BookingData
     contact_info: BookingContact
     status: str = "confirmed"  # confirmed, cancelled, completed
+    # Set when a double booking found at startup lost its slot to an older booking
+    slot_conflict: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
@@ -126,11 +214,19 @@ class ResourceDownload(BaseModel):
     ip_address: Optional[str] = None
     downloaded_at: datetime = Field(default_factory=datetime.utcnow)
 
-class NewsletterSubscription(BaseModel):
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
-    email: EmailStr
-    status: str = "active"  # active, unsubscribed
-    subscribed_at: datetime = Field(default_factory=datetime.utcnow)
+class ResourceDownloadBucket(BaseModel):
+    id: str
+    resource_id: str
+    hour: datetime
+    count: int
+    first_at: datetime
+    last_at: datetime
+    events: List[Dict[str, Any]] = []
+
+class EventRollup(BaseModel):
+    hour: datetime
+    count: int
+    resource_id: Optional[str] = None
 
 class NewsletterSubscribe(BaseModel):
     email: EmailStr
@@ -188,173 +284,318 @@ async def root():
     return {"message": "Hello World"}
 
 @api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
-    status_obj = StatusCheck(**status_dict)
-    _ = await db.status_checks.insert_one(status_obj.dict())
+async def create_status_check(input: StatusCheckCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
+    status_obj = created(StatusCheck, input)
+    await record_status_check(db, status_obj.dict())
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
+async def get_status_checks(format: Optional[ExportFormat] = None, db: AsyncIOMotorDatabase = Depends(get_database)):
+    if format:
+        return stream_export(
+            db[STATUS_CHECK_BUCKETS], format, StatusCheck,
+            pipeline=unwind_pipeline("checks", "timestamp"),
+            filename="status_checks"
+        )
+    status_checks = await recent_events(db[STATUS_CHECK_BUCKETS], "checks", "timestamp", 1000)
+    return trusted_response(StatusCheck, status_checks)
+
+@api_router.get("/status/rollup", response_model=List[EventRollup])
+async def get_status_check_rollup(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Status checks per hour, read from the bucket counters (last 7 days unless ``from`` is given)"""
+    return await hourly_rollup(db[STATUS_CHECK_BUCKETS], start=start, end=end)
 
 # Quote endpoints
-@api_router.post("/quotes", response_model=Quote)
+@api_router.post("/quotes", response_model=Quote, status_code=202)
 async def create_quote(quote_input: QuoteCreate):
-    quote_dict = quote_input.dict()
-    quote_obj = Quote(**quote_dict)
-    _ = await db.quotes.insert_one(quote_obj.dict())
+    """Accept a quote; it is written by the submission queue"""
+    quote_obj = created(Quote, quote_input)
+    await submission_queue.submit("quotes", quote_obj.dict(), activity=True, quotes_total=1)
     return quote_obj
 
 @api_router.get("/quotes", response_model=List[Quote])
-async def get_quotes():
-    quotes = await db.quotes.find().sort("created_at", -1).to_list(100)
-    return [Quote(**quote) for quote in quotes]
+async def get_quotes(
+    response: Response,
+    status: Optional[str] = None,
+    format: Optional[ExportFormat] = Depends(admin_export_format),
+    page: PageParams = Depends(),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    if format:
+        return stream_export(
+            db.quotes, format, Quote,
+            filter={"status": status} if status else {},
+            sort=[("created_at", -1), ("id", -1)]
+        )
+    quotes = await paginate(
+        db.quotes, page, response,
+        filter={"status": status} if status else {},
+        sort_fields=["created_at"],
+        default_sort="-created_at"
+    )
+    return trusted_response(Quote, quotes, response)
 
 @api_router.get("/quotes/{quote_id}", response_model=Quote)
-async def get_quote(quote_id: str):
+async def get_quote(quote_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     quote = await db.quotes.find_one({"id": quote_id})
     if not quote:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Quote not found")
-    return Quote(**quote)
+    return trusted_response(Quote, quote)
 
 @api_router.put("/quotes/{quote_id}", response_model=Quote)
-async def update_quote(quote_id: str, quote_input: QuoteCreate):
+async def update_quote(quote_id: str, quote_input: QuoteCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
     quote_dict = quote_input.dict()
     quote_dict["updated_at"] = datetime.utcnow()
     
-    result = await db.quotes.update_one(
-        {"id": quote_id}, 
-        {"$set": quote_dict}
+    updated_quote = await db.quotes.find_one_and_update(
+        {"id": quote_id},
+        {"$set": quote_dict},
+        return_document=ReturnDocument.AFTER
     )
+    content_cache.bump_version("quotes")
     
-    if result.matched_count == 0:
-        from fastapi import HTTPException
+    if updated_quote is None:
         raise HTTPException(status_code=404, detail="Quote not found")
-    
-    updated_quote = await db.quotes.find_one({"id": quote_id})
-    return Quote(**updated_quote)
+    return trusted_response(Quote, updated_quote)
 
 # Booking endpoints
 @api_router.post("/bookings", response_model=Booking)
-async def create_booking(booking_input: BookingCreate):
-    booking_dict = booking_input.dict()
-    booking_obj = Booking(**booking_dict)
-    _ = await db.bookings.insert_one(booking_obj.dict())
+async def create_booking(booking_input: BookingCreate, db: AsyncIOMotorDatabase = Depends(get_database)):
+    booking_obj = created(Booking, booking_input)
+    slot = slot_fields(booking_obj.booking_data.date, booking_obj.booking_data.time, booking_obj.status)
+    try:
+        # The unique slot index makes the reservation atomic
+        await db.bookings.insert_one({**booking_obj.dict(), **slot})
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="This time slot is already booked")
+    await increment_counters(
+        db, activity=True, bookings_total=1,
+        bookings_confirmed=1 if booking_obj.status == "confirmed" else 0
+    )
+    content_cache.bump_version("bookings")
     return booking_obj
 
 @api_router.get("/bookings", response_model=List[Booking])
-async def get_bookings():
-    bookings = await db.bookings.find().sort("created_at", -1).to_list(100)
-    return [Booking(**booking) for booking in bookings]
+async def get_bookings(
+    response: Response,
+    status: Optional[str] = None,
+    format: Optional[ExportFormat] = Depends(admin_export_format),
+    page: PageParams = Depends(),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    if format:
+        return stream_export(
+            db.bookings, format, Booking,
+            filter={"status": status} if status else {},
+            sort=[("created_at", -1), ("id", -1)]
+        )
+    bookings = await paginate(
+        db.bookings, page, response,
+        filter={"status": status} if status else {},
+        sort_fields=["created_at"],
+        default_sort="-created_at"
+    )
+    return trusted_response(Booking, bookings, response)
+
+@api_router.get("/bookings/availability")
+async def get_availability_range(
+    start: str = Query(..., alias="from"),
+    end: str = Query(..., alias="to"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Availability of every day in a date range, with each day's reserved slots as a bitmap"""
+    return await availability_range(db, start, end)
 
 @api_router.get("/bookings/{booking_id}", response_model=Booking)
-async def get_booking(booking_id: str):
+async def get_booking(booking_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     booking = await db.bookings.find_one({"id": booking_id})
     if not booking:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Booking not found")
-    return Booking(**booking)
+    return trusted_response(Booking, booking)
 
 @api_router.get("/bookings/availability/{date}")
-async def get_availability(date: str):
+async def get_availability(date: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get available time slots for a specific date"""
-    bookings = await db.bookings.find({
-        "booking_data.date": date,
-        "status": {"$ne": "cancelled"}
-    }).to_list(100)
-    
-    booked_times = [booking["booking_data"]["time"] for booking in bookings]
-    
-    # All possible time slots
-    all_slots = [
-        '09:00', '09:30', '10:00', '10:30', '11:00', '11:30',
-        '14:00', '14:30', '15:00', '15:30', '16:00', '16:30', '17:00'
-    ]
-    
-    available_slots = [slot for slot in all_slots if slot not in booked_times]
-    
+    availability = await availability_range(db, date, date)
+    day = availability["days"][0]
     return {
         "date": date,
-        "available_slots": available_slots,
-        "booked_slots": booked_times
+        "available_slots": day["available_slots"],
+        "booked_slots": day["booked_slots"]
     }
 
+class BookingStatusUpdate(BaseModel):
+    status: Literal["confirmed", "cancelled", "completed"]
+
+@api_router.put("/bookings/{booking_id}/status", response_model=Booking)
+async def update_booking_status(
+    booking_id: str,
+    status_update: BookingStatusUpdate,
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Update a booking status; cancelling releases its slot (requires authentication)"""
+    changes = {"status": status_update.status, "updated_at": datetime.utcnow()}
+    # A booking whose date could not be parsed (slot_date null) never holds a slot
+    reserved = {"$and": [
+        status_update.status != CANCELLED_STATUS,
+        {"$eq": [{"$type": "$slot_date"}, "date"]},
+    ]}
+    try:
+        # The previous status is needed for the counters; the new document is derived from it
+        previous = await db.bookings.find_one_and_update(
+            {"id": booking_id},
+            [{"$set": {**{field: {"$literal": value} for field, value in changes.items()}, "reserved": reserved}}]
+        )
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail="This time slot is already booked")
+    if previous is None:
+        raise HTTPException(status_code=404, detail="Booking not found")
+
+    await increment_counters(
+        db,
+        bookings_confirmed=(status_update.status == "confirmed") - (previous["status"] == "confirmed")
+    )
+    content_cache.bump_version("bookings")
+    return trusted_response(Booking, {**previous, **changes})
+
 # Resource endpoints
 @api_router.get("/resources", response_model=List[Resource])
-async def get_resources():
+async def get_resources(db: AsyncIOMotorDatabase = Depends(get_database)):
     resources = await db.resources.find().sort("created_at", -1).to_list(100)
-    return [Resource(**resource) for resource in resources]
+    return trusted_response(Resource, resources)
 
 @api_router.get("/resources/{resource_id}", response_model=Resource)
-async def get_resource(resource_id: str):
+async def get_resource(resource_id: str, db: AsyncIOMotorDatabase = Depends(get_database)):
     resource = await db.resources.find_one({"id": resource_id})
     if not resource:
         from fastapi import HTTPException
         raise HTTPException(status_code=404, detail="Resource not found")
-    return Resource(**resource)
+    return trusted_response(Resource, resource)
 
 @api_router.post("/resources/{resource_id}/download")
-async def download_resource(resource_id: str, user_email: Optional[str] = None):
-    from fastapi import Request, HTTPException
-    
-    # Check if resource exists
-    resource = await db.resources.find_one({"id": resource_id})
+async def download_resource(resource_id: str, user_email: Optional[str] = None, db: AsyncIOMotorDatabase = Depends(get_database)):
+    # Check if resource exists; a per-id lookup on the unique id index, not worth caching
+    resource = await db.resources.find_one({"id": resource_id}, {"_id": 0})
     if not resource:
         raise HTTPException(status_code=404, detail="Resource not found")
     
-    # Record download
+    # Record download; the log insert and the downloads $inc are written behind in batches
     download_record = ResourceDownload(
         resource_id=resource_id,
         user_email=user_email
     )
-    await db.resource_downloads.insert_one(download_record.dict())
-    
-    # Increment download count
-    await db.resources.update_one(
-        {"id": resource_id},
-        {"$inc": {"downloads": 1}}
-    )
+    await download_buffer.record(download_record.dict())
     
     # Return clean resource data without MongoDB ObjectId
-    clean_resource = Resource(**resource)
-    return {"message": "Download recorded", "resource": clean_resource.dict()}
+    return {"message": "Download recorded", "resource": trusted(Resource, resource)}
+
+@api_router.get("/resource-downloads", response_model=List[ResourceDownloadBucket])
+async def get_resource_downloads(
+    response: Response,
+    resource_id: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    format: Optional[ExportFormat] = None,
+    page: PageParams = Depends(),
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get the download log as hourly buckets, or as individual downloads with ?format (requires authentication)"""
+    filter = {"resource_id": resource_id} if resource_id else {}
+    if format:
+        return stream_export(
+            db[DOWNLOAD_BUCKETS], format, ResourceDownload,
+            pipeline=unwind_pipeline("events", "downloaded_at", filter, start, end, carry=("resource_id",)),
+            filename="resource_downloads"
+        )
+    buckets = await paginate(
+        db[DOWNLOAD_BUCKETS], page, response,
+        filter={**filter, **hour_range(start, end)},
+        sort_fields=["hour"],
+        default_sort="-hour"
+    )
+    return trusted_response(ResourceDownloadBucket, buckets, response)
+
+@api_router.get("/resource-downloads/rollup", response_model=List[EventRollup])
+async def get_resource_download_rollup(
+    resource_id: Optional[str] = None,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    current_user: AdminUser = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Downloads per resource per hour, read from the bucket counters, last 7 days unless ``from`` is given (requires authentication)"""
+    return await hourly_rollup(
+        db[DOWNLOAD_BUCKETS],
+        filter={"resource_id": resource_id} if resource_id else {},
+        start=start, end=end,
+        fields=("resource_id",)
+    )
 
 @api_router.post("/newsletter/subscribe")
-async def subscribe_newsletter(subscription: NewsletterSubscribe):
-    # Check if already subscribed
-    existing = await db.newsletter_subscriptions.find_one({"email": subscription.email})
+async def subscribe_newsletter(subscription: NewsletterSubscribe, db: AsyncIOMotorDatabase = Depends(get_database)):
+    # Single upsert: the unique email index settles concurrent signups
+    sub_record = NewsletterSubscription(email=subscription.email)
+    try:
+        result = await db.newsletter_subscriptions.update_one(
+            {"email": sub_record.email},
+            {"$setOnInsert": sub_record.dict()},
+            upsert=True
+        )
+        created = result.upserted_id is not None
+    except DuplicateKeyError:
+        created = False
     
-    if existing:
+    if not created:
         return {"message": "Email already subscribed", "status": "existing"}
     
-    # Create new subscription
-    sub_record = NewsletterSubscription(email=subscription.email)
-    await db.newsletter_subscriptions.insert_one(sub_record.dict())
+    await increment_counters(db, newsletter_active=1)
+    content_cache.bump_version("newsletter_subscriptions")
     
     return {"message": "Successfully subscribed to newsletter", "status": "new"}
 
-@api_router.post("/contact", response_model=ContactMessage)
+@api_router.post("/contact", response_model=ContactMessage, status_code=202)
 async def submit_contact_message(contact: ContactMessageCreate):
-    """Submit a contact message"""
-    contact_dict = contact.dict()
-    contact_obj = ContactMessage(**contact_dict)
-    _ = await db.contact_messages.insert_one(contact_obj.dict())
+    """Submit a contact message; it is written by the submission queue"""
+    contact_obj = created(ContactMessage, contact)
+    await submission_queue.submit("contact_messages", contact_obj.dict())
     return contact_obj
 
 @api_router.get("/contact", response_model=List[ContactMessage])
-async def get_contact_messages():
-    """Get all contact messages (admin only in real scenario)"""
-    messages = await db.contact_messages.find().sort("submitted_at", -1).to_list(100)
-    return [ContactMessage(**message) for message in messages]
+async def get_contact_messages(
+    response: Response,
+    status: Optional[str] = None,
+    format: Optional[ExportFormat] = Depends(admin_export_format),
+    page: PageParams = Depends(),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get contact messages page by page, optionally filtered by status; ?format exports require authentication"""
+    if format:
+        return stream_export(
+            db.contact_messages, format, ContactMessage,
+            filter={"status": status} if status else {},
+            sort=[("submitted_at", -1), ("id", -1)]
+        )
+    messages = await paginate(
+        db.contact_messages, page, response,
+        filter={"status": status} if status else {},
+        sort_fields=["submitted_at"],
+        default_sort="-submitted_at"
+    )
+    return trusted_response(ContactMessage, messages, response)
 
 class ContactStatusUpdate(BaseModel):
     status: str
 
 @api_router.put("/contact/{message_id}/status")
-async def update_contact_status(message_id: str, status_update: ContactStatusUpdate):
+async def update_contact_status(message_id: str, status_update: ContactStatusUpdate, db: AsyncIOMotorDatabase = Depends(get_database)):
     """Update contact message status"""
     result = await db.contact_messages.update_one(
         {"id": message_id}, 
@@ -367,17 +608,18 @@ async def update_contact_status(message_id: str, status_update: ContactStatusUpd
     
     return {"message": "Status updated successfully"}
 
-@api_router.post("/testimonials/submit")
+@api_router.post("/testimonials/submit", status_code=202)
 async def submit_testimonial(testimonial: PublicTestimonialSubmission):
-    """Submit a testimonial from public user"""
-    testimonial_dict = testimonial.dict()
-    testimonial_obj = PendingTestimonial(**testimonial_dict)
-    await db.pending_testimonials.insert_one(testimonial_obj.dict())
+    """Submit a testimonial from public user; it is written by the submission queue"""
+    testimonial_obj = created(PendingTestimonial, testimonial)
+    testimonial_id = await submission_queue.submit(
+        "pending_testimonials", testimonial_obj.dict(), activity=True, pending_testimonials=1
+    )
     
-    return {"message": "Témoignage soumis avec succès. Il sera examiné avant publication.", "status": "submitted"}
+    return {"message": "Témoignage soumis avec succès. Il sera examiné avant publication.", "status": "submitted", "id": testimonial_id}
 
 @api_router.post("/resources/init")
-async def init_default_resources():
+async def init_default_resources(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Initialize default resources if they don't exist"""
     
     # Check if resources already exist
@@ -461,6 +703,8 @@ async def init_default_resources():
         resources_to_insert.append(resource.dict())
     
     result = await db.resources.insert_many(resources_to_insert)
+    await increment_counters(db, downloads_total=sum(r["downloads"] for r in resources_to_insert))
+    content_cache.bump_version("resources")
     
     return {
         "message": "Default resources initialized successfully",
@@ -468,135 +712,180 @@ async def init_default_resources():
         "resource_ids": [str(id) for id in result.inserted_ids]
     }
 
+# ================== HEALTH ENDPOINTS ==================
+# Probes bypass the concurrency pools (see concurrency.ROUTE_CLASSES)
+
+@api_router.get("/health/live")
+async def liveness():
+    """The process is up and serving requests"""
+    return {"status": "alive"}
+
+@api_router.get("/health/ready")
+async def readiness_probe(response: Response):
+    """Ready once the startup warm-up (DB ping, indexes, caches) has completed; 503 until then"""
+    if not readiness.ready:
+        response.status_code = 503
+    return readiness.stats()
+
+# ================== SYSTEM ENDPOINTS ==================
+
+@api_router.get("/system/db-pool")
+async def get_db_pool_stats(current_user: AdminUser = Depends(get_current_user)):
+    """MongoDB connection pool settings and counters (requires authentication)"""
+    return get_pool_stats()
+
+@api_router.get("/system/hashing")
+async def get_hashing_stats(current_user: AdminUser = Depends(get_current_user)):
+    """Password hashing executor latency and queue depth (requires authentication)"""
+    return hashing_executor.stats()
+
+@api_router.get("/system/downloads")
+async def get_download_buffer_stats(current_user: AdminUser = Depends(get_current_user)):
+    """Download write-behind queue depth and flush lag (requires authentication)"""
+    return download_buffer.stats()
+
+@api_router.get("/system/submissions")
+async def get_submission_queue_stats(current_user: AdminUser = Depends(get_current_user)):
+    """Public submission queue depth, flushes and retries (requires authentication)"""
+    return submission_queue.stats()
+
+@api_router.post("/system/migrations/event-buckets")
+async def migrate_to_event_buckets(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Convert per-event download and status-check documents into hourly buckets (requires authentication)"""
+    migrated = await migrate_event_buckets(db)
+    return {"message": "Event collections migrated to hourly buckets", "migrated": migrated}
+
+@api_router.get("/system/indexes")
+async def get_index_report(current_user: AdminUser = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Compare MongoDB indexes with the index registry (requires authentication)"""
+    return await verify_indexes(db)
+
+@api_router.get("/system/concurrency")
+async def get_concurrency_stats(current_user: AdminUser = Depends(get_current_user)):
+    """Per route class concurrency pools: running, queued and shed requests (requires authentication)"""
+    return concurrency_stats()
+
+@api_router.get("/system/rate-limits")
+async def get_rate_limit_stats(current_user: AdminUser = Depends(get_current_user)):
+    """Rate limit rules and token bucket counters (requires authentication)"""
+    return {"rules": rate_limiter.describe(), **rate_limiter.stats()}
+
+@api_router.get("/system/cache")
+async def get_cache_stats(current_user: AdminUser = Depends(get_current_user)):
+    """Public content cache hit rate and collection versions (requires authentication)"""
+    return content_cache.stats()
+
 # Include the admin router, auth router and analytics router
 api_router.include_router(admin_router)
 api_router.include_router(auth_router)
 api_router.include_router(analytics_router)
 
 # ================== PUBLIC PORTFOLIO ENDPOINTS ==================
-# These endpoints are used to feed the public portfolio
-
-@api_router.get("/public/personal", response_model=dict)
-async def get_public_personal_info():
+# These endpoints are used to feed the public portfolio.
+# Reads are served from content_cache until an admin write bumps the collection version.
+
+PUBLIC_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+# /public/statistics is served from the analytics snapshot, versioned on each refresh
+STATISTICS_COLLECTIONS = ("analytics_snapshot",)
+
+def public_etag(*collections: str):
+    """Dependency answering If-None-Match from collection versions before any query runs"""
+    async def check_etag(request: Request, response: Response, db: AsyncIOMotorDatabase = Depends(get_database)):
+        if "analytics_snapshot" in collections:
+            # A 304 never reaches the handler, so revalidating clients must still age the
+            # snapshot out; the refreshed version changes the ETag on their next request
+            analytics_snapshot.refresh_if_stale(db)
+        etag = content_cache.etag(collections, salt=f"{request.url.path}?{request.url.query}")
+        headers = {"ETag": etag, "Cache-Control": PUBLIC_CACHE_CONTROL}
+        if_none_match = request.headers.get("if-none-match", "")
+        candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if etag in candidates or "*" in candidates:
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+    return Depends(check_etag)
+
+@api_router.get("/public/personal", response_model=dict, dependencies=[public_etag("personal_info")])
+async def get_public_personal_info(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get personal information for public portfolio"""
-    personal = await db.personal_info.find_one()
-    if not personal:
-        return {}
-    # Remove MongoDB _id field for JSON serialization
-    personal.pop("_id", None)
-    return personal
-
-@api_router.get("/public/skills", response_model=List[dict])
-async def get_public_skills():
+    personal = await content_cache.find_one(db, "personal_info")
+    return personal or {}
+
+@api_router.get("/public/skills", response_model=List[dict], dependencies=[public_etag("skill_categories")])
+async def get_public_skills(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get skills for public portfolio"""
-    skills = await db.skill_categories.find().to_list(100)
-    # Remove MongoDB _id fields
-    return [{k: v for k, v in skill.items() if k != "_id"} for skill in skills]
+    return await content_cache.find(db, "skill_categories")
 
-@api_router.get("/public/technologies", response_model=List[dict])
-async def get_public_technologies():
+@api_router.get("/public/technologies", response_model=List[dict], dependencies=[public_etag("technologies")])
+async def get_public_technologies(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get technologies for public portfolio"""
-    techs = await db.technologies.find().sort("name", 1).to_list(100)
-    return [{k: v for k, v in tech.items() if k != "_id"} for tech in techs]
+    return await content_cache.find(db, "technologies", sort=[("name", 1)])
 
-@api_router.get("/public/projects", response_model=List[dict])
-async def get_public_projects():
+@api_router.get("/public/projects", response_model=List[dict], dependencies=[public_etag("projects")])
+async def get_public_projects(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get projects for public portfolio"""
-    projects = await db.projects.find().sort("order_index", 1).to_list(100)
-    return [{k: v for k, v in project.items() if k != "_id"} for project in projects]
+    return await content_cache.find(db, "projects", sort=[("order_index", 1)])
 
-@api_router.get("/public/services", response_model=List[dict])
-async def get_public_services():
+@api_router.get("/public/services", response_model=List[dict], dependencies=[public_etag("services")])
+async def get_public_services(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get services for public portfolio"""
-    services = await db.services.find().sort("order_index", 1).to_list(100)
-    return [{k: v for k, v in service.items() if k != "_id"} for service in services]
+    return await content_cache.find(db, "services", sort=[("order_index", 1)])
 
-@api_router.get("/public/testimonials", response_model=List[dict])
-async def get_public_testimonials():
+@api_router.get("/public/testimonials", response_model=List[dict], dependencies=[public_etag("testimonials")])
+async def get_public_testimonials(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get testimonials for public portfolio"""
-    testimonials = await db.testimonials.find().sort("order_index", 1).to_list(100)
-    return [{k: v for k, v in testimonial.items() if k != "_id"} for testimonial in testimonials]
+    return await content_cache.find(db, "testimonials", sort=[("order_index", 1)])
 
-@api_router.get("/public/statistics", response_model=List[dict])
-async def get_public_statistics():
+@api_router.get("/public/statistics", response_model=List[dict], dependencies=[public_etag(*STATISTICS_COLLECTIONS)])
+async def get_public_statistics(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get curated statistics for public portfolio - only the most impressive ones"""
     try:
-        # Import analytics functions
-        from analytics_routes import (
-            calculate_content_stats, 
-            calculate_engagement_stats, 
-            calculate_technical_stats, 
-            calculate_business_stats
-        )
-        
-        # Calculate all statistics
-        all_stats = []
-        try:
-            content_stats = await calculate_content_stats()
-            all_stats.extend(content_stats)
-        except:
-            pass
-            
-        try:
-            engagement_stats = await calculate_engagement_stats()
-            all_stats.extend(engagement_stats)
-        except:
-            pass
-            
-        try:
-            technical_stats = await calculate_technical_stats()
-            all_stats.extend(technical_stats)
-        except:
-            pass
-            
-        try:
-            business_stats = await calculate_business_stats()
-            all_stats.extend(business_stats)
-        except:
-            pass
+        # Read all statistics from the snapshot shared with the admin dashboard
+        snapshot = await analytics_snapshot.get(db)
+        all_stats = snapshot["statistics"]
         
         # Select only the most impressive statistics for public display
         public_worthy_stats = []
         
         for stat in all_stats:
-            value = int(stat.value) if stat.value.isdigit() else 0
+            value = int(stat["value"]) if stat["value"].isdigit() else 0
             
             # Criteria for public display - only show impressive numbers
             show_stat = False
             
-            if stat.title == "Projets Totaux" and value >= 1:
+            if stat["title"] == "Projets Totaux" and value >= 1:
                 show_stat = True
-            elif stat.title == "Taux d'Achèvement" and value >= 85:
+            elif stat["title"] == "Taux d'Achèvement" and value >= 85:
                 show_stat = True
-            elif stat.title == "Articles Publiés" and value >= 3:
+            elif stat["title"] == "Articles Publiés" and value >= 3:
                 show_stat = True
-            elif stat.title == "Technologies" and value >= 5:
+            elif stat["title"] == "Technologies" and value >= 5:
                 show_stat = True
-            elif stat.title == "Témoignages" and value >= 3:
+            elif stat["title"] == "Témoignages" and value >= 3:
                 show_stat = True
-            elif stat.title == "Niveau Expert" and value >= 1:
+            elif stat["title"] == "Niveau Expert" and value >= 1:
                 show_stat = True
-            elif stat.title == "Services" and value >= 2:
+            elif stat["title"] == "Services" and value >= 2:
                 show_stat = True
-            elif stat.title == "Téléchargements" and value >= 100:
+            elif stat["title"] == "Téléchargements" and value >= 100:
                 show_stat = True
-            elif stat.title == "Réservations" and value >= 5:
+            elif stat["title"] == "Réservations" and value >= 5:
                 show_stat = True
-            elif stat.title == "Note Moyenne" and value >= 4:
+            elif stat["title"] == "Note Moyenne" and value >= 4:
                 show_stat = True
-            elif stat.title == "Abonnés Newsletter" and value >= 50:
+            elif stat["title"] == "Abonnés Newsletter" and value >= 50:
                 show_stat = True
-            elif stat.title == "Compétences" and value >= 10:
+            elif stat["title"] == "Compétences" and value >= 10:
                 show_stat = True
             
             if show_stat:
                 public_worthy_stats.append({
-                    "title": stat.title,
-                    "value": stat.value,
-                    "suffix": stat.suffix,
-                    "description": stat.description,
-                    "icon": stat.icon,
-                    "color": stat.color,
+                    "title": stat["title"],
+                    "value": stat["value"],
+                    "suffix": stat["suffix"],
+                    "description": stat["description"],
+                    "icon": stat["icon"],
+                    "color": stat["color"],
                     "order_index": len(public_worthy_stats)
                 })
         
@@ -692,43 +981,120 @@ async def get_public_statistics():
             }
         ]
 
-@api_router.get("/public/social-links", response_model=List[dict])
-async def get_public_social_links():
+@api_router.get("/public/social-links", response_model=List[dict], dependencies=[public_etag("social_links")])
+async def get_public_social_links(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get social links for public portfolio"""
-    links = await db.social_links.find().sort("order_index", 1).to_list(100)
-    return [{k: v for k, v in link.items() if k != "_id"} for link in links]
+    return await content_cache.find(db, "social_links", sort=[("order_index", 1)])
 
-@api_router.get("/public/process-steps", response_model=List[dict])
-async def get_public_process_steps():
+@api_router.get("/public/process-steps", response_model=List[dict], dependencies=[public_etag("process_steps")])
+async def get_public_process_steps(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get process steps for public portfolio"""
-    steps = await db.process_steps.find().sort("step", 1).to_list(100)
-    return [{k: v for k, v in step.items() if k != "_id"} for step in steps]
+    return await content_cache.find(db, "process_steps", sort=[("step", 1)])
 
-@api_router.get("/public/blog", response_model=List[dict])
-async def get_public_blog_posts():
+@api_router.get("/public/blog", response_model=List[dict], dependencies=[public_etag("blog_posts")])
+async def get_public_blog_posts(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get published blog posts for public blog"""
-    posts = await db.blog_posts.find({"published": True}).sort("created_at", -1).to_list(100)
-    return [{k: v for k, v in post.items() if k != "_id"} for post in posts]
-
-# Configure CORS middleware BEFORE including routers (CRITICAL FIX)
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    return await content_cache.find(db, "blog_posts", {"published": True}, sort=[("created_at", -1)])
+
+# Sections served by /public/bundle, keyed by the name used in ?sections=
+PUBLIC_BUNDLE_SECTIONS = {
+    "personal": get_public_personal_info,
+    "skills": get_public_skills,
+    "technologies": get_public_technologies,
+    "projects": get_public_projects,
+    "services": get_public_services,
+    "testimonials": get_public_testimonials,
+    "statistics": get_public_statistics,
+    "social_links": get_public_social_links,
+    "process_steps": get_public_process_steps,
+}
+
+@api_router.get("/public/bundle", response_model=Dict[str, Any], dependencies=[public_etag(
+    "personal_info", "skill_categories", "technologies", "projects", "services",
+    "testimonials", "social_links", "process_steps", *STATISTICS_COLLECTIONS
+)])
+async def get_public_bundle(sections: Optional[str] = None, db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Get every homepage section in one response, optionally limited with ?sections=a,b"""
+    if sections:
+        names = [name.strip() for name in sections.split(",") if name.strip()]
+        unknown = [name for name in names if name not in PUBLIC_BUNDLE_SECTIONS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown sections: {', '.join(unknown)}")
+    else:
+        names = list(PUBLIC_BUNDLE_SECTIONS)
+    
+    results = await asyncio.gather(*(PUBLIC_BUNDLE_SECTIONS[name](db) for name in names))
+    return dict(zip(names, results))
 
-# Include the router in the main app AFTER CORS configuration
-app.include_router(api_router)
+# ================== METRICS ==================
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger(__name__)
+async def get_metrics():
+    """Request, MongoDB command and component metrics in Prometheus text format"""
+    return PlainTextResponse(metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def create_app() -> FastAPI:
+    """Build the application.
+
+    Nothing here connects or reads data: the MongoDB client, background
+    writers and warm-up all belong to the lifespan.
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+    # Create the main app without a prefix
+    app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+
+    # Route class concurrency pools; added before CORS so shed 503s still carry CORS headers
+    app.add_middleware(ConcurrencyLimitMiddleware)
+
+    # Per client IP token buckets on public POSTs and login, checked before a pool slot is taken
+    app.add_middleware(RateLimitMiddleware)
+
+    # Configure CORS middleware BEFORE including routers (CRITICAL FIX)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[
+            "ETag", "X-Next-Cursor", "X-Total-Count", "Retry-After",
+            "RateLimit-Limit", "RateLimit-Remaining", "RateLimit-Reset", "RateLimit-Policy",
+        ],
+    )
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+    # Opt-in per-request MongoDB trace (QUERY_TRACE_ENABLED) with a Server-Timing header
+    app.add_middleware(QueryTraceMiddleware)
+
+    # Outermost middleware, so latency covers CORS and error handling too
+    app.add_middleware(MetricsMiddleware)
+
+    # Scraped by Prometheus at the root path, outside the /api prefix
+    metrics_registry.register_collector("mongodb_pool", get_pool_stats)
+    metrics_registry.register_collector("hashing_executor", hashing_executor.stats)
+    metrics_registry.register_collector("download_buffer", download_buffer.stats)
+    metrics_registry.register_collector("submission_queue", submission_queue.stats)
+    metrics_registry.register_collector("public_cache", content_cache.stats)
+    metrics_registry.register_collector("rate_limiter", rate_limiter.stats)
+    metrics_registry.register_collector("startup", readiness.stats)
+    app.add_api_route("/metrics", get_metrics, include_in_schema=False)
+
+    # Include the router in the main app AFTER CORS configuration
+    app.include_router(api_router)
+    return app
+
+
+def __getattr__(name: str):
+    """``server.app``, the single ASGI entry point (`uvicorn server:app`).
+
+    It is built on first access rather than at import, so importing this
+    module (models, benchmarks) has no side effects and the app, its
+    middleware and its metrics collectors are only ever set up once.
+    """
+    if name == "app":
+        app = globals()["app"] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,86 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import logging
+import time
+import os
+
+logger = logging.getLogger(__name__)
+
+# A warm-up step must finish within this, so a missing database cannot hang startup
+WARMUP_STEP_TIMEOUT_SECONDS = float(os.environ.get("WARMUP_STEP_TIMEOUT_SECONDS", "10"))
+# While not ready, the warm-up is retried in the background at this interval
+WARMUP_RETRY_SECONDS = float(os.environ.get("WARMUP_RETRY_SECONDS", "5"))
+
+WarmupStep = Tuple[str, Callable[[], Awaitable[Any]]]
+
+
+class Readiness:
+    """Startup warm-up sequence and whether the application is ready to serve.
+
+    Steps run in order and stop at the first failure, since each relies on
+    the ones before it (no index check without a reachable database). The
+    time from ``started_at`` (server import) to the end of the last step is
+    logged once, when the application becomes ready.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.attempts = 0
+        self.steps_ms: Dict[str, float] = {}
+        self.last_error: Optional[str] = None
+        self.ready_in_ms: Optional[float] = None
+        self._retry: Optional[asyncio.Task] = None
+
+    async def warm_up(self, steps: List[WarmupStep]) -> bool:
+        self.attempts += 1
+        for name, action in steps:
+            started = time.monotonic()
+            try:
+                await asyncio.wait_for(action(), timeout=WARMUP_STEP_TIMEOUT_SECONDS)
+            except Exception as e:
+                self.last_error = f"{name}: {str(e) or 'timed out'}"
+                logger.error(f"Warm-up step {self.last_error} (attempt {self.attempts})")
+                return False
+            self.steps_ms[name] = round((time.monotonic() - started) * 1000, 2)
+
+        self.ready = True
+        self.last_error = None
+        self.ready_in_ms = round((time.monotonic() - self.started_at) * 1000, 2)
+        steps_summary = ", ".join(f"{name} {ms} ms" for name, ms in self.steps_ms.items())
+        logger.info(f"Ready {self.ready_in_ms} ms after import ({steps_summary})")
+        return True
+
+    async def start(self, steps: List[WarmupStep], started_at: float):
+        """Warm up before serving; if that fails, keep retrying in the background while not ready"""
+        self.started_at = started_at
+        if not await self.warm_up(steps):
+            self._retry = asyncio.create_task(self._retry_until_ready(steps))
+
+    async def _retry_until_ready(self, steps: List[WarmupStep]):
+        while True:
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+            if await self.warm_up(steps):
+                return
+
+    async def stop(self):
+        if self._retry is not None:
+            self._retry.cancel()
+            try:
+                await self._retry
+            except asyncio.CancelledError:
+                pass
+            self._retry = None
+        self.ready = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "attempts": self.attempts,
+            "ready_in_ms": self.ready_in_ms,
+            "steps_ms": self.steps_ms,
+            "last_error": self.last_error,
+        }
+
+
+readiness = Readiness()
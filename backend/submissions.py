@@ -0,0 +1,332 @@
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError, PyMongoError
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, IO, List, Optional
+import asyncio
+import fcntl
+import logging
+import time
+import os
+
+from cache import content_cache
+from counters import increment_counters
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class SubmissionQueue:
+    """Durable write-behind queue for public submissions (contact, testimonials, quotes).
+
+    Each submission is appended to a journal segment under ``directory``
+    before it is acknowledged, then written with one unordered ``insert_many``
+    per collection every ``flush_interval_ms`` or once ``flush_events`` are
+    waiting. A flush starts a new segment and deletes the older ones once their
+    submissions are written or re-journaled, so whatever is on disk at startup
+    is exactly what was never written and gets replayed.
+
+    Documents get their ``_id`` when queued, which makes a replayed or retried
+    insert of an already written submission a harmless duplicate key error.
+    A process holds an exclusive lock on ``directory`` while it runs, so each
+    worker needs its own SUBMISSION_QUEUE_DIR; a second one fails to start.
+    """
+
+    def __init__(self, directory: str, flush_interval_ms: int = 500, flush_events: int = 100,
+                 queue_limit: int = 5000, fsync: bool = False):
+        self.directory = Path(directory)
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_events = flush_events
+        self.queue_limit = queue_limit
+        self.fsync = fsync
+        self._db: Optional[AsyncIOMotorDatabase] = None
+        self._items: List[Dict[str, Any]] = []
+        self._enqueued_at: List[float] = []
+        self._segment: Optional[IO[str]] = None
+        self._segments: List[Path] = []
+        self._lock_file: Optional[IO[str]] = None
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.replayed = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.written = 0
+        self.duplicates = 0
+        self.retried = 0
+        self.rejected = 0
+        self.total_flush_seconds = 0.0
+        self.last_flush_lag_ms = 0.0
+
+    def start(self, db: AsyncIOMotorDatabase):
+        """Replay submissions left on disk by the previous process and start the writer"""
+        self._db = db
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._claim_directory()
+        self._segments = sorted(self.directory.glob("segment-*.ndjson"))
+        now = time.monotonic()
+        for path in self._segments:
+            for line in path.read_text(encoding="utf-8").splitlines():
+                try:
+                    self._items.append(json_util.loads(line))
+                except ValueError:
+                    # A line cut short by a crash was never acknowledged
+                    logger.warning(f"Skipping truncated submission in {path.name}")
+                    continue
+                self._enqueued_at.append(now)
+        self.replayed = len(self._items)
+        if self.replayed:
+            logger.info(f"Replaying {self.replayed} queued submissions from {len(self._segments)} segments")
+        self._open_segment()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the writer, write out what is queued and keep anything unwritten on disk"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._db is not None:
+            await self.flush()
+        if self._segment is not None:
+            self._segment.close()
+            path = Path(self._segment.name)
+            if not self._items and path.stat().st_size == 0:
+                path.unlink()
+            self._segment = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _claim_directory(self):
+        """Lock ``directory`` for this process; the OS releases it if the process dies"""
+        # Appending, so a failed claim does not erase the owner's pid
+        lock_file = open(self.directory / "owner.lock", "a")
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            raise RuntimeError(
+                f"Submission queue directory {self.directory} is owned by another process; "
+                "give each worker its own SUBMISSION_QUEUE_DIR"
+            )
+        lock_file.truncate(0)
+        lock_file.write(str(os.getpid()))
+        lock_file.flush()
+        self._lock_file = lock_file
+
+    async def submit(self, collection: str, document: Dict[str, Any], activity: bool = False, **counters: int) -> str:
+        """Journal ``document`` for ``collection`` and queue it; returns its ``id``.
+
+        ``activity`` and ``counters`` are applied with ``increment_counters``
+        once the document is written.
+        """
+        if len(self._items) >= self.queue_limit:
+            # Backpressure: write inline, and shed if the database cannot keep up
+            await self.flush()
+            if len(self._items) >= self.queue_limit:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Submission queue full, please retry",
+                    headers={"Retry-After": "5"},
+                )
+
+        item = {
+            "collection": collection,
+            "document": {"_id": ObjectId(), **document},
+            "activity": int(activity),
+            "counters": counters,
+        }
+        try:
+            self._segment.write(json_util.dumps(item) + "\n")
+            self._segment.flush()
+            if self.fsync:
+                await asyncio.to_thread(os.fsync, self._segment.fileno())
+        except OSError:
+            # Not journaled, so not acknowledged
+            logger.exception("Could not journal submission")
+            raise HTTPException(
+                status_code=503,
+                detail="Submission could not be saved, please retry",
+                headers={"Retry-After": "5"},
+            )
+
+        self._items.append(item)
+        self._enqueued_at.append(time.monotonic())
+        if len(self._items) >= self.flush_events:
+            self._wakeup.set()
+        return document["id"]
+
+    async def _run(self):
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                await self.flush()
+            except Exception:
+                # Keep the writer alive; flush() has put back whatever it could not write
+                logger.exception("Submission flush failed")
+
+    def _open_segment(self):
+        path = self.directory / f"segment-{time.time_ns()}.ndjson"
+        self._segment = open(path, "a", encoding="utf-8")
+
+    def _rotate(self) -> List[Path]:
+        """Start a new segment; returns the segments holding everything queued so far"""
+        previous = self._segment
+        # Opened first, so a failure leaves the current segment in place
+        self._open_segment()
+        previous.close()
+        flushed = self._segments + [Path(previous.name)]
+        self._segments = []
+        return flushed
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not self._items:
+                return
+            items, self._items = self._items, []
+            enqueued_at, self._enqueued_at = self._enqueued_at, []
+            try:
+                flushed_segments = self._rotate()
+            except Exception:
+                self._items[:0] = items
+                self._enqueued_at[:0] = enqueued_at
+                raise
+
+            started = time.monotonic()
+            by_collection: Dict[str, List[int]] = {}
+            for index, item in enumerate(items):
+                by_collection.setdefault(item["collection"], []).append(index)
+
+            written: List[int] = []
+            retry: List[int] = []
+            rejected: List[int] = []
+            for collection, indexes in by_collection.items():
+                try:
+                    await self._db[collection].insert_many(
+                        [items[index]["document"] for index in indexes], ordered=False
+                    )
+                    written.extend(indexes)
+                except BulkWriteError as e:
+                    # Unordered: every document not listed in writeErrors was inserted
+                    errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+                    for position, index in enumerate(indexes):
+                        error = errors.get(position)
+                        if error is None:
+                            written.append(index)
+                        elif error.get("code") == DUPLICATE_KEY:
+                            # Written by an earlier attempt whose acknowledgement was lost
+                            self.duplicates += 1
+                        else:
+                            logger.error(f"Submission rejected by {collection}: {error.get('errmsg')}")
+                            rejected.append(index)
+                except PyMongoError as e:
+                    logger.error(f"Submission flush to {collection} failed, retrying {len(indexes)}: {e}")
+                    retry.extend(indexes)
+                except Exception:
+                    logger.exception(f"Submission flush to {collection} failed, retrying {len(indexes)}")
+                    retry.extend(indexes)
+
+            journaled = True
+            if retry:
+                self.failed_flushes += 1
+                self.retried += len(retry)
+                journaled = self._requeue([items[index] for index in retry], [enqueued_at[index] for index in retry])
+            if rejected:
+                self.rejected += len(rejected)
+                if not self._reject([items[index] for index in rejected]):
+                    journaled = self._requeue([items[index] for index in rejected],
+                                              [enqueued_at[index] for index in rejected]) and journaled
+            if journaled:
+                for path in flushed_segments:
+                    path.unlink(missing_ok=True)
+            else:
+                # Unwritten submissions are only on disk in these segments; delete them on a later flush
+                self._segments[:0] = flushed_segments
+
+            if written:
+                await self._apply_counters([items[index] for index in written])
+
+            finished = time.monotonic()
+            self.flushes += 1
+            self.written += len(written)
+            self.total_flush_seconds += finished - started
+            self.last_flush_lag_ms = round((finished - enqueued_at[0]) * 1000, 2)
+
+    async def _apply_counters(self, items: List[Dict[str, Any]]):
+        for collection in {item["collection"] for item in items}:
+            content_cache.bump_version(collection)
+        counters: Counter = Counter()
+        for item in items:
+            counters.update(item["counters"])
+        try:
+            await increment_counters(self._db, activity=sum(item["activity"] for item in items), **counters)
+        except PyMongoError as e:
+            # The submissions are stored; only the denormalized counters lag until reconciled
+            logger.error(f"Counter update failed for {len(items)} submissions: {e}")
+
+    def _requeue(self, items: List[Dict[str, Any]], enqueued_at: List[float]) -> bool:
+        """Put unwritten submissions back at the head of the queue and journal them into the new segment.
+
+        Returns False when the journal write failed, in which case the
+        segments they came from must be kept.
+        """
+        self._items[:0] = items
+        self._enqueued_at[:0] = enqueued_at
+        try:
+            self._segment.writelines(json_util.dumps(item) + "\n" for item in items)
+            self._segment.flush()
+        except OSError:
+            logger.exception(f"Could not journal {len(items)} unwritten submissions")
+            return False
+        return True
+
+    def _reject(self, items: List[Dict[str, Any]]) -> bool:
+        """Keep submissions the database refused in a dead-letter file for manual replay"""
+        try:
+            with open(self.directory / "rejected.ndjson", "a", encoding="utf-8") as rejected:
+                rejected.writelines(json_util.dumps(item) + "\n" for item in items)
+        except OSError:
+            logger.exception(f"Could not write {len(items)} rejected submissions to the dead-letter file")
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        flushes = self.flushes or 1
+        oldest = self._enqueued_at[0] if self._enqueued_at else None
+        return {
+            "directory": str(self.directory),
+            "flush_interval_ms": int(self.flush_interval * 1000),
+            "flush_events": self.flush_events,
+            "queue_limit": self.queue_limit,
+            "queue_depth": len(self._items),
+            "oldest_submission_age_ms": round((time.monotonic() - oldest) * 1000, 2) if oldest else 0.0,
+            "replayed": self.replayed,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "retried": self.retried,
+            "rejected": self.rejected,
+            "avg_flush_ms": round(self.total_flush_seconds / flushes * 1000, 2),
+            "last_flush_lag_ms": self.last_flush_lag_ms,
+        }
+
+
+submission_queue = SubmissionQueue(
+    directory=os.environ.get("SUBMISSION_QUEUE_DIR", str(Path(__file__).parent / "submission_queue")),
+    flush_interval_ms=int(os.environ.get("SUBMISSION_FLUSH_INTERVAL_MS", "500")),
+    flush_events=int(os.environ.get("SUBMISSION_FLUSH_EVENTS", "100")),
+    queue_limit=int(os.environ.get("SUBMISSION_QUEUE_LIMIT", "5000")),
+    fsync=os.environ.get("SUBMISSION_QUEUE_FSYNC", "false").lower() in ("1", "true", "yes"),
+)
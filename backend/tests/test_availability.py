@@ -0,0 +1,196 @@
+from datetime import date, datetime
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from availability import (
+    FULL_DAY, MAX_RANGE_DAYS, SLOTS, availability_range, backfill_booking_slots, day_availability,
+    resolve_slot_conflicts, slot_bitmap, slot_fields, slots_from_bitmap
+)
+
+
+def path(document, dotted):
+    for part in dotted.split("."):
+        document = document.get(part) if isinstance(document, dict) else None
+    return document
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeBookings:
+    """Just enough of a Motor collection for the availability queries and the startup repairs"""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def find(self, filter, projection=None):
+        bounds = filter["slot_date"]
+        return FakeCursor([
+            document for document in self.documents
+            if document.get("reserved") and bounds["$gte"] <= document["slot_date"] <= bounds["$lte"]
+        ])
+
+    async def update_many(self, filter, update):
+        modified = 0
+        for document in self.documents:
+            if self._matches(document, filter):
+                if isinstance(update, list):
+                    for stage in update:
+                        document.update({field: self._evaluate(document, expression)
+                                         for field, expression in stage["$set"].items()})
+                else:
+                    document.update(update["$set"])
+                modified += 1
+        return type("UpdateResult", (), {"modified_count": modified})()
+
+    def aggregate(self, pipeline, **options):
+        documents = [document for document in self.documents if self._matches(document, pipeline[0]["$match"])]
+        documents.sort(key=lambda document: tuple(document[field] for field in pipeline[1]["$sort"]))
+        groups = {}
+        for document in documents:
+            key = tuple((name, path(document, source[1:])) for name, source in pipeline[2]["$group"]["_id"].items())
+            groups.setdefault(key, []).append(document["id"])
+        return FakeCursor([{"_id": dict(key), "ids": ids} for key, ids in groups.items() if len(ids) > 1])
+
+    def _matches(self, document, filter):
+        for field, condition in filter.items():
+            if field == "$or":
+                if not any(self._matches(document, branch) for branch in condition):
+                    return False
+            elif field == "id" and isinstance(condition, dict):
+                if document["id"] not in condition["$in"]:
+                    return False
+            elif isinstance(condition, dict) and "$exists" in condition:
+                if (field in document) != condition["$exists"]:
+                    return False
+            elif document.get(field) != condition:
+                return False
+        return True
+
+    def _evaluate(self, document, expression):
+        """The aggregation operators used by backfill_booking_slots"""
+        if isinstance(expression, str) and expression.startswith("$"):
+            return path(document, expression[1:])
+        if not isinstance(expression, dict):
+            return expression
+        (op, args), = expression.items()
+        if op == "$dateFromString":
+            value = self._evaluate(document, args["dateString"])
+            try:
+                return datetime.strptime(value, "%Y-%m-%d")
+            except (TypeError, ValueError):
+                return args["onError"]
+        if op == "$substrBytes":
+            value = self._evaluate(document, args[0])
+            return value[args[1]:args[1] + args[2]] if isinstance(value, str) else ""
+        if op == "$type":
+            return "date" if isinstance(self._evaluate(document, args), datetime) else "null"
+        values = [self._evaluate(document, arg) for arg in args]
+        if op == "$and":
+            return all(values)
+        if op == "$eq":
+            return values[0] == values[1]
+        if op == "$ne":
+            return values[0] != values[1]
+        raise AssertionError(f"Unexpected operator {op}")
+
+
+class FakeDatabase:
+    def __init__(self, bookings):
+        self.bookings = FakeBookings(bookings)
+
+
+def booking(id, day, time, status="confirmed", created_at=None, **fields):
+    return {
+        "id": id, "status": status, "created_at": created_at or datetime(2024, 1, 1),
+        "booking_data": {"date": day, "time": time}, **fields,
+    }
+
+
+def test_bitmap_round_trip_ignores_unknown_slots():
+    mask = slot_bitmap(["09:00", "14:30", "12:15"])
+    assert slots_from_bitmap(mask) == ["09:00", "14:30"]
+    assert slots_from_bitmap(FULL_DAY) == SLOTS
+
+
+def test_day_availability_splits_booked_and_free_slots():
+    day = day_availability(date(2024, 3, 4), slot_bitmap(["09:00"]))
+    assert day["booked_slots"] == ["09:00"]
+    assert day["available_slots"] == SLOTS[1:]
+
+
+def test_slot_fields_validate_time_and_release_cancelled_bookings():
+    assert slot_fields("2024-03-04T10:00:00Z", "10:00", "confirmed") == {
+        "slot_date": datetime(2024, 3, 4), "reserved": True
+    }
+    assert slot_fields("2024-03-04", "10:00", "cancelled")["reserved"] is False
+    with pytest.raises(HTTPException) as error:
+        slot_fields("2024-03-04", "12:15", "confirmed")
+    assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("start, end", [
+    ("2024-01-01", "2024-03-03"),  # 63 days
+    ("2024-01-02", "2024-01-01"),
+    ("2024-01-01", "not a date"),
+])
+def test_availability_range_rejects_invalid_ranges(start, end):
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(availability_range(FakeDatabase([]), start, end))
+    assert error.value.status_code == 400
+
+
+def test_availability_range_covers_max_range_with_reserved_slots_only():
+    db = FakeDatabase([
+        {**booking("a", "2024-01-01", "09:00"), "slot_date": datetime(2024, 1, 1), "reserved": True},
+        {**booking("b", "2024-01-01", "10:00", "cancelled"), "slot_date": datetime(2024, 1, 1), "reserved": False},
+    ])
+    result = asyncio.run(availability_range(db, "2024-01-01", "2024-03-02"))
+    assert len(result["days"]) == MAX_RANGE_DAYS
+    assert result["days"][0]["booked_slots"] == ["09:00"]
+    assert result["days"][1]["booked_slots"] == []
+
+
+def test_backfill_reserves_parseable_bookings_only():
+    db = FakeDatabase([
+        booking("a", "2024-05-02T09:00:00", "09:00"),
+        booking("b", "2024-05-02", "09:30", "cancelled"),
+        booking("c", "next tuesday", "09:00"),
+        # Backfilled by an earlier version that reserved unparseable dates
+        booking("d", "??", "09:00", slot_date=None, reserved=True),
+    ])
+    asyncio.run(backfill_booking_slots(db))
+    slots = {document["id"]: (document["slot_date"], document["reserved"]) for document in db.bookings.documents}
+    assert slots == {
+        "a": (datetime(2024, 5, 2), True),
+        "b": (datetime(2024, 5, 2), False),
+        "c": (None, False),
+        "d": (None, False),
+    }
+
+
+def test_resolve_slot_conflicts_keeps_the_oldest_booking():
+    slot = {"slot_date": datetime(2024, 5, 2), "reserved": True}
+    db = FakeDatabase([
+        booking("late", "2024-05-02", "09:00", created_at=datetime(2024, 4, 3), **slot),
+        booking("early", "2024-05-02", "09:00", created_at=datetime(2024, 4, 1), **slot),
+        booking("other", "2024-05-02", "10:00", created_at=datetime(2024, 4, 2), **slot),
+    ])
+    assert asyncio.run(resolve_slot_conflicts(db)) == 1
+    state = {document["id"]: (document["reserved"], document.get("slot_conflict", False))
+             for document in db.bookings.documents}
+    assert state == {"early": (True, False), "late": (False, True), "other": (True, False)}
+    assert asyncio.run(resolve_slot_conflicts(db)) == 0
@@ -0,0 +1,131 @@
+from datetime import datetime
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pymongo import DeleteOne, InsertOne, UpdateOne
+
+from admin_routes import bulk_write_collection
+from counters import COMPLETED_PROJECT_STATUS
+from models import BulkRequest, BulkUpdateItem
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+class FakeCollection:
+    """Applies the InsertOne/UpdateOne/DeleteOne by id that bulk_write_collection sends"""
+
+    def __init__(self, documents=()):
+        self.documents = {document["id"]: dict(document) for document in documents}
+        self.bulk_writes = 0
+
+    def find(self, filter, projection=None):
+        ids = filter["id"]["$in"]
+        fields = [field for field, include in (projection or {}).items() if include]
+        return FakeCursor([
+            {field: document[field] for field in fields if field in document}
+            for id, document in self.documents.items() if id in ids
+        ])
+
+    async def bulk_write(self, operations, ordered=True):
+        self.bulk_writes += 1
+        counts = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0}
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                self.documents[operation._doc["id"]] = operation._doc
+                counts["nInserted"] += 1
+            elif isinstance(operation, UpdateOne):
+                document = self.documents.get(operation._filter["id"])
+                if document is not None:
+                    document.update(operation._doc["$set"])
+                    counts["nMatched"] += 1
+                    counts["nModified"] += 1
+            elif isinstance(operation, DeleteOne):
+                counts["nRemoved"] += self.documents.pop(operation._filter["id"], None) is not None
+        return type("BulkWriteResult", (), {"bulk_api_result": counts})()
+
+    async def update_one(self, filter, update):
+        self.increments = update["$inc"]
+
+
+class FakeDatabase:
+    def __init__(self, **collections):
+        self.collections = collections
+        self.metrics = FakeCollection()
+
+    def __getitem__(self, name):
+        return self.collections[name]
+
+
+def project(id, status="in_progress", order_index=None):
+    return {
+        "id": id, "title": id, "category": "web", "level": "intermediate", "description": "",
+        "status": status, "duration": "1 month", "order_index": order_index,
+    }
+
+
+def step(id, number):
+    return {"id": id, "step": number, "title": id, "description": "", "icon": "code"}
+
+
+def bulk(collection, db, **request):
+    return asyncio.run(bulk_write_collection(collection, BulkRequest(**request), current_user=None, db=db))
+
+
+def test_create_update_delete_and_counters_in_one_bulk_write():
+    projects = FakeCollection([project("kept"), project("gone", status=COMPLETED_PROJECT_STATUS)])
+    db = FakeDatabase(projects=projects)
+    new = {key: value for key, value in project("new", status=COMPLETED_PROJECT_STATUS).items() if key != "id"}
+
+    response = bulk("projects", db,
+                    create=[new, {"title": "missing fields"}],
+                    update=[BulkUpdateItem(id="kept", changes={"status": COMPLETED_PROJECT_STATUS}),
+                            BulkUpdateItem(id="nobody", changes={"status": COMPLETED_PROJECT_STATUS})],
+                    delete=["gone", "nobody"])
+
+    assert projects.bulk_writes == 1
+    assert (response.inserted, response.modified, response.deleted) == (1, 1, 1)
+    assert [(item.op, item.status) for item in response.results] == [
+        ("create", "ok"), ("create", "invalid"),
+        ("update", "ok"), ("update", "not_found"),
+        ("delete", "ok"), ("delete", "not_found"),
+    ]
+    assert projects.documents["kept"]["status"] == COMPLETED_PROJECT_STATUS
+    assert isinstance(projects.documents["kept"]["updated_at"], datetime)
+    # Totals: +1 created, -1 deleted; completed: +1 created, +1 updated, -1 deleted
+    assert db.metrics.increments == {"projects_completed": 1}
+
+
+def test_reorder_writes_order_index():
+    projects = FakeCollection([project("a", order_index=0), project("b", order_index=1)])
+    response = bulk("projects", FakeDatabase(projects=projects), reorder={"a": 1, "b": 0, "c": 2})
+
+    assert projects.documents["a"]["order_index"] == 1
+    assert projects.documents["b"]["order_index"] == 0
+    assert [item.status for item in response.results] == ["ok", "ok", "not_found"]
+
+
+def test_reorder_process_steps_writes_step():
+    steps = FakeCollection([step("plan", 1), step("build", 2)])
+    bulk("process-steps", FakeDatabase(process_steps=steps), reorder={"plan": 2, "build": 1})
+
+    assert (steps.documents["plan"]["step"], steps.documents["build"]["step"]) == (2, 1)
+    assert "order_index" not in steps.documents["plan"]
+
+
+def test_unknown_collection_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        bulk("admin_users", FakeDatabase())
+    assert error.value.status_code == 404
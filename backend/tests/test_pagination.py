@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+from fastapi import HTTPException
+
+from pagination import _after, decode_cursor, encode_cursor
+
+
+def matches(document, query):
+    """The subset of MongoDB query semantics produced by ``_after``"""
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(document, branch) for branch in condition):
+                return False
+            continue
+        value = document.get(key)
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+        for op, operand in condition.items():
+            if op == "$ne" and value == operand:
+                return False
+            # Ranges never match null, as in MongoDB
+            if op == "$gt" and (value is None or not value > operand):
+                return False
+            if op == "$lt" and (value is None or not value < operand):
+                return False
+    return True
+
+
+def mongo_order(documents, field, direction):
+    """Sort by (field, id) the way MongoDB does: null before any value"""
+    key = lambda document: (document[field] is not None, document[field] or 0, document["id"])
+    return sorted(documents, key=key, reverse=direction == -1)
+
+
+DOCUMENTS = [
+    {"id": "a", "rating": 3},
+    {"id": "b", "rating": None},
+    {"id": "c", "rating": 5},
+    {"id": "d", "rating": 3},
+    {"id": "e", "rating": None},
+    {"id": "f", "rating": 1},
+]
+
+
+@pytest.mark.parametrize("direction", [1, -1])
+def test_keyset_walk_visits_every_document_once_with_nulls(direction):
+    ordered = mongo_order(DOCUMENTS, "rating", direction)
+    seen = []
+    query = {}
+    while True:
+        page = mongo_order([document for document in DOCUMENTS if matches(document, query)], "rating", direction)[:2]
+        if not page:
+            break
+        seen.extend(page)
+        last = page[-1]
+        cursor = encode_cursor("rating", direction, last["rating"], last["id"])
+        value, last_id = decode_cursor(cursor, "rating", direction)
+        query = _after("rating", direction, value, last_id)
+    assert [document["id"] for document in seen] == [document["id"] for document in ordered]
+
+
+def test_cursor_round_trips_datetimes_and_null():
+    moment = datetime(2024, 5, 1, 12, 30, 15, 250000)
+    assert decode_cursor(encode_cursor("created_at", -1, moment, "x"), "created_at", -1) == (moment, "x")
+    assert decode_cursor(encode_cursor("created_at", 1, None, "y"), "created_at", 1) == (None, "y")
+
+
+def test_cursor_for_another_sort_is_rejected():
+    cursor = encode_cursor("created_at", -1, None, "x")
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, "created_at", 1)
+    assert error.value.status_code == 400
+
+
+def test_malformed_cursor_is_rejected():
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("not-a-cursor", "created_at", -1)
+    assert error.value.status_code == 400
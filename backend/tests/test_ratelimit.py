@@ -0,0 +1,37 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from ratelimit import RateLimitMiddleware, RateLimiter, parse_rules
+
+
+def limited_client(trusted_proxies: int) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/api/auth/login")
+    async def login():
+        return {}
+
+    limiter = RateLimiter(parse_rules("POST /api/auth/login 2/60"), trusted_proxies=trusted_proxies)
+    app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    return TestClient(app)
+
+
+def test_spoofed_forwarded_for_does_not_reset_bucket():
+    client = limited_client(trusted_proxies=0)
+    statuses = [
+        client.post("/api/auth/login", headers={"X-Forwarded-For": f"10.0.0.{i}"}).status_code
+        for i in range(4)
+    ]
+    assert statuses == [200, 200, 429, 429]
+
+
+def test_forwarded_for_read_behind_configured_proxy():
+    client = limited_client(trusted_proxies=1)
+    statuses = [
+        client.post("/api/auth/login", headers={"X-Forwarded-For": f"1.2.3.4, 10.0.0.{i}"}).status_code
+        for i in range(3)
+    ]
+    # The entry appended by our proxy is the client; the spoofed leftmost one is ignored
+    assert statuses == [200, 200, 200]
+    assert client.post("/api/auth/login", headers={"X-Forwarded-For": "10.0.0.0"}).status_code == 200
+    assert client.post("/api/auth/login", headers={"X-Forwarded-For": "10.0.0.0"}).status_code == 429
@@ -0,0 +1,191 @@
+from pymongo import monitoring
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from contextvars import ContextVar
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+import threading
+import time
+import os
+
+from metrics import command_collection, route_template
+
+logger = logging.getLogger(__name__)
+
+# Opt-in: tracing adds a shape computation to every command while enabled
+QUERY_TRACE_ENABLED = os.environ.get("QUERY_TRACE_ENABLED", "false").lower() in ("1", "true", "yes")
+QUERY_TRACE_MAX_QUERIES = int(os.environ.get("QUERY_TRACE_MAX_QUERIES", "10"))
+QUERY_TRACE_MAX_DB_MS = float(os.environ.get("QUERY_TRACE_MAX_DB_MS", "100"))
+QUERY_TRACE_REPEAT_THRESHOLD = int(os.environ.get("QUERY_TRACE_REPEAT_THRESHOLD", "3"))
+
+# Connection handshake and authentication, not issued by handlers
+IGNORED_COMMANDS = {"hello", "ismaster", "isMaster", "saslStart", "saslContinue", "authenticate", "endSessions"}
+
+# Where each command keeps the part of its document that identifies the query
+SHAPE_FIELDS = {
+    "find": ("filter", "sort", "projection"),
+    "aggregate": ("pipeline",),
+    "count": ("query",),
+    "distinct": ("key", "query"),
+    "findAndModify": ("query", "sort"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+}
+
+
+def _shape(value: Any) -> Any:
+    """``value`` with every literal replaced by "?", keeping keys and operators"""
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        shapes = [_shape(item) for item in value]
+        return shapes if any(isinstance(item, (dict, list)) for item in shapes) else "?"
+    return "?"
+
+
+def query_shape(command_name: str, collection: str, command: Dict[str, Any]) -> str:
+    """Identical shapes differ only by literal values, e.g. one find per id in a loop"""
+    parts = {field: _shape(command[field]) for field in SHAPE_FIELDS.get(command_name, ()) if field in command}
+    # Updates and deletes are batches; the first statement stands for the batch
+    for field in ("updates", "deletes"):
+        if isinstance(parts.get(field), list) and parts[field]:
+            parts[field] = parts[field][0].get("q")
+    return f"{collection}.{command_name} {json.dumps(parts, sort_keys=True)}"
+
+
+def documents_returned(command_name: str, reply: Dict[str, Any]) -> int:
+    cursor = reply.get("cursor")
+    if isinstance(cursor, dict):
+        return len(cursor.get("firstBatch") or cursor.get("nextBatch") or [])
+    if command_name == "findAndModify":
+        return 1 if reply.get("value") else 0
+    return int(reply.get("n", 0) or 0)
+
+
+class QueryTrace:
+    """MongoDB commands issued while serving one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.commands: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, command: Dict[str, Any]):
+        with self._lock:
+            self.commands.append(command)
+
+    @property
+    def db_ms(self) -> float:
+        return sum(command["duration_ms"] for command in self.commands)
+
+    def repeated_shapes(self) -> List[Tuple[str, int]]:
+        counts = Counter(command["shape"] for command in self.commands)
+        return [(shape, count) for shape, count in counts.most_common() if count >= QUERY_TRACE_REPEAT_THRESHOLD]
+
+
+current_trace: ContextVar[Optional[QueryTrace]] = ContextVar("current_trace", default=None)
+
+
+class QueryTraceListener(monitoring.CommandListener):
+    """Adds every command to the trace of the request that issued it.
+
+    Motor runs pymongo on executor threads with a copy of the caller's
+    context, so ``current_trace`` resolves to the issuing request there too.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[Any, int], Tuple[QueryTrace, str, str]] = {}
+
+    def started(self, event):
+        trace = current_trace.get()
+        if trace is None or event.command_name in IGNORED_COMMANDS:
+            return
+        collection = command_collection(event.command_name, event.command)
+        shape = query_shape(event.command_name, collection, event.command)
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (trace, collection, shape)
+
+    def _finish(self, event, documents: int, failed: bool):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        trace, collection, shape = pending
+        trace.add({
+            "collection": collection,
+            "operation": event.command_name,
+            "duration_ms": event.duration_micros / 1000,
+            "documents": documents,
+            "failed": failed,
+            "shape": shape,
+        })
+
+    def succeeded(self, event):
+        if self._pending:
+            self._finish(event, documents_returned(event.command_name, event.reply), failed=False)
+
+    def failed(self, event):
+        if self._pending:
+            self._finish(event, 0, failed=True)
+
+
+query_trace_listener = QueryTraceListener()
+
+
+def server_timing(trace: QueryTrace) -> str:
+    total_ms = (time.perf_counter() - trace.started) * 1000
+    return f'db;dur={trace.db_ms:.2f};desc="{len(trace.commands)} queries", total;dur={total_ms:.2f}'
+
+
+def report(trace: QueryTrace, request: str, total_ms: float):
+    """Log requests over the query-count or database-time budget and repeated query shapes"""
+    db_ms = trace.db_ms
+    if len(trace.commands) > QUERY_TRACE_MAX_QUERIES or db_ms > QUERY_TRACE_MAX_DB_MS:
+        lines = "\n".join(
+            f"  {command['collection']}.{command['operation']} {command['duration_ms']:.2f} ms, "
+            f"{command['documents']} docs{' (failed)' if command['failed'] else ''}"
+            for command in trace.commands
+        )
+        logger.warning(
+            f"{request}: {len(trace.commands)} queries, {db_ms:.2f} ms in MongoDB "
+            f"of {total_ms:.2f} ms total (budget {QUERY_TRACE_MAX_QUERIES} queries, "
+            f"{QUERY_TRACE_MAX_DB_MS:g} ms)\n{lines}"
+        )
+    for shape, count in trace.repeated_shapes():
+        logger.warning(f"{request}: query shape repeated {count} times, possible N+1: {shape}")
+
+
+class QueryTraceMiddleware:
+    """Traces MongoDB commands per request when QUERY_TRACE_ENABLED is set.
+
+    Adds a ``Server-Timing`` header with database and total time up to the
+    response headers, then checks the complete trace against the budgets.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not QUERY_TRACE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace = QueryTrace()
+        token = current_trace.set(trace)
+
+        async def send_with_timing(message: Message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(trace))
+                headers.append("Timing-Allow-Origin", "*")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_trace.reset(token)
+            total_ms = (time.perf_counter() - trace.started) * 1000
+            report(trace, f"{scope['method']} {route_template(scope)}", total_ms)
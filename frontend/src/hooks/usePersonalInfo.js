@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const usePersonalInfo = () => {
   const [personalInfo, setPersonalInfo] = useState({
@@ -19,13 +20,7 @@ const usePersonalInfo = () => {
     const fetchPersonalInfo = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/personal`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des informations personnelles');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('personal');
         
         // Si on a des données, les utiliser, sinon garder les données par défaut
         if (data && Object.keys(data).length > 0) {
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useProcessSteps = () => {
   const [processSteps, setProcessSteps] = useState([]);
@@ -9,13 +10,7 @@ const useProcessSteps = () => {
     const fetchProcessSteps = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/process-steps`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des étapes du processus');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('process_steps');
         // Trier par numéro d'étape
         const sortedSteps = data.sort((a, b) => a.step - b.step);
         
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useProjects = () => {
   const [projects, setProjects] = useState([]);
@@ -9,13 +10,7 @@ const useProjects = () => {
     const fetchProjects = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/projects`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des projets');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('projects');
         // Trier par order_index puis par date de création
         const sortedProjects = data.sort((a, b) => {
           if (a.order_index !== b.order_index) {
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useServices = () => {
   const [services, setServices] = useState([]);
@@ -9,13 +10,7 @@ const useServices = () => {
     const fetchServices = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/services`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des services');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('services');
         // Trier par order_index
         const sortedServices = data.sort((a, b) => (a.order_index || 0) - (b.order_index || 0));
         
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useSkills = () => {
   const defaultSkills = {
@@ -70,15 +71,7 @@ const useSkills = () => {
     const fetchSkills = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/skills`);
-        
-        if (!response.ok) {
-          console.warn('Failed to fetch skills from API, using default data');
-          setError(null);
-          return;
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('skills');
         
         if (data && data.length > 0) {
           setSkillCategories(data);
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useSocialLinks = () => {
   const [socialLinks, setSocialLinks] = useState([]);
@@ -9,13 +10,7 @@ const useSocialLinks = () => {
     const fetchSocialLinks = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/social-links`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des liens sociaux');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('social_links');
         // Trier par order_index
         const sortedLinks = data.sort((a, b) => (a.order_index || 0) - (b.order_index || 0));
         
@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useStatistics = () => {
   const [statistics, setStatistics] = useState([]);
@@ -9,13 +10,7 @@ const useStatistics = () => {
     const fetchStatistics = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/statistics`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des statistiques');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('statistics');
         // Trier par order_index
         const sortedStats = data.sort((a, b) => (a.order_index || 0) - (b.order_index || 0));
         
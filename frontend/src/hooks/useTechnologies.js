@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useTechnologies = () => {
   const [technologies, setTechnologies] = useState([]);
@@ -9,13 +10,7 @@ const useTechnologies = () => {
     const fetchTechnologies = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/technologies`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des technologies');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('technologies');
         // Trier par nom
         const sortedTechnologies = data.sort((a, b) => a.name.localeCompare(b.name));
         
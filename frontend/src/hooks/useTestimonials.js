@@ -1,4 +1,5 @@
 import { useState, useEffect } from 'react';
+import { fetchPublicSection } from '../lib/publicBundle';
 
 const useTestimonials = () => {
   const [testimonials, setTestimonials] = useState([]);
@@ -9,13 +10,7 @@ const useTestimonials = () => {
     const fetchTestimonials = async () => {
       try {
         setLoading(true);
-        const response = await fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/testimonials`);
-        
-        if (!response.ok) {
-          throw new Error('Erreur lors du chargement des témoignages');
-        }
-        
-        const data = await response.json();
+        const data = await fetchPublicSection('testimonials');
         // Trier par order_index puis par date de création
         const sortedTestimonials = data.sort((a, b) => {
           if (a.order_index !== b.order_index) {
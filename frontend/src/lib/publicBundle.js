@@ -0,0 +1,33 @@
+// Charge toutes les sections publiques en une seule requête (/api/public/bundle)
+// et la partage entre les hooks montés pendant le même chargement de page.
+const BUNDLE_TTL_MS = 30000;
+
+let bundlePromise = null;
+let bundleLoadedAt = 0;
+
+const loadBundle = () => {
+  const isFresh = bundlePromise && Date.now() - bundleLoadedAt < BUNDLE_TTL_MS;
+  if (!isFresh) {
+    bundleLoadedAt = Date.now();
+    bundlePromise = fetch(`${process.env.REACT_APP_BACKEND_URL}/api/public/bundle`)
+      .then((response) => {
+        if (!response.ok) {
+          throw new Error('Erreur lors du chargement des données publiques');
+        }
+        return response.json();
+      })
+      .catch((err) => {
+        // Ne pas garder un échec en cache : le prochain hook réessaiera
+        bundlePromise = null;
+        throw err;
+      });
+  }
+  return bundlePromise;
+};
+
+export const fetchPublicSection = async (section) => {
+  const bundle = await loadBundle();
+  return bundle[section];
+};
+
+export default fetchPublicSection;